@@ -2,8 +2,6 @@ import streamlit as st
 import time
 import os
 from dotenv import load_dotenv
-import json
-from datetime import datetime
 
 # Load environment variables FIRST
 load_dotenv()
@@ -13,9 +11,11 @@ if not os.getenv("OPENAI_API_KEY"):
     st.error("❌ OPENAI_API_KEY not found! Please add it to your .env file")
     st.stop()
 
-from backend.rag import DocumentationRAG
-from backend.scraper import DocumentationScraper
-import re
+# The RAG and scraper modules (langchain, qdrant-client, openai, bs4) load on
+# first use or in the background pre-warm, not before the first render
+from backend.catalog import get_catalog
+from backend.startup import prewarm_in_background
+from backend.formatting import has_code, parse_answer
 import hashlib
 
 # Page configuration with dark theme
@@ -508,11 +508,44 @@ if 'input_key' not in st.session_state:
     st.session_state.input_key = 0
 if 'progress_info' not in st.session_state:
     st.session_state.progress_info = {"step": "", "progress": 0}
+if 'prewarmed' not in st.session_state:
+    # Import the heavy backend dependencies and load a local embedding model
+    # while the user is still on the welcome screen
+    prewarm_in_background()
+    st.session_state.prewarmed = True
+if 'catalog_loaded' not in st.session_state:
+    # List collections indexed in earlier sessions; each one is only
+    # attached to Qdrant when the user first opens it
+    for entry in get_catalog().list():
+        st.session_state.rag_systems.setdefault(entry['source_url'], None)
+    st.session_state.catalog_loaded = True
 
 def get_collection_name(url):
     """Generate a unique collection name from URL"""
     return f"doc_{hashlib.md5(url.encode()).hexdigest()[:8]}"
 
+def get_rag_system(url):
+    """Return the RAG system for a URL, attaching catalogued collections lazily"""
+    rag = st.session_state.rag_systems.get(url)
+    if rag is None:
+        from backend.rag import DocumentationRAG
+        rag = DocumentationRAG(get_collection_name(url))
+        rag.load_existing_vector_store()
+        st.session_state.rag_systems[url] = rag
+    return rag
+
+# Start retrieval as soon as the question is entered (Enter or focus change),
+# so clicking Send only waits for generation
+def prefetch_question(input_key):
+    question = st.session_state.get(input_key, "")
+    if question and st.session_state.current_doc:
+        try:
+            get_rag_system(st.session_state.current_doc).prefetch(
+                question, history=st.session_state.chat_history
+            )
+        except Exception:
+            pass
+
 # Progress callback for scraping
 def update_progress_callback(current, total, message):
     st.session_state.progress_info = {
@@ -548,10 +581,10 @@ with st.sidebar:
                 max_pages = st.number_input(
                     "Max pages",
                     min_value=10,
-                    max_value=100,
+                    max_value=20000,
                     value=30,
                     step=10,
-                    help="More pages = better coverage"
+                    help="More pages = better coverage. Crawls of 1000+ pages use large-site mode (disk-backed frontier, streamed ingestion)."
                 )
             
             with col2:
@@ -576,6 +609,7 @@ with st.sidebar:
             with col2:
                 if st.button("🗑️", key=f"del_{url}", help="Remove"):
                     del st.session_state.rag_systems[url]
+                    get_catalog().remove(get_collection_name(url))
                     if st.session_state.current_doc == url:
                         st.session_state.current_doc = None
                     st.rerun()
@@ -620,10 +654,12 @@ if st.session_state.processing and doc_url:
     
     try:
         # Initialize RAG system
+        from backend.rag import DocumentationRAG
         collection_name = get_collection_name(doc_url)
         rag = DocumentationRAG(collection_name)
         
         # Set progress callback
+        from backend.scraper import DocumentationScraper
         scraper = DocumentationScraper(doc_url, max_pages)
         scraper.set_progress_callback(update_progress_callback)
         
@@ -658,8 +694,10 @@ if st.session_state.processing and doc_url:
                         st.progress(progress)
                 
                 if i == 1:
-                    # Actually create the vector store during crawling step
-                    rag.create_vector_store(doc_url, max_pages=max_pages)
+                    # Actually create the vector store during crawling step,
+                    # continuing an earlier run for this URL if it was interrupted
+                    # (a checkpoint that can't be built on is replaced)
+                    rag.create_vector_store(doc_url, max_pages=max_pages, resume=rag.can_resume(doc_url))
                 else:
                     time.sleep(0.5)  # Brief pause for other steps
         
@@ -704,44 +742,26 @@ elif st.session_state.current_doc:
                 </div>
                 """, unsafe_allow_html=True)
             else:
-                # Assistant message with potential code blocks
+                # Assistant messages are parsed once and rendered from the cached segments
+                if "segments" not in message:
+                    message["segments"] = parse_answer(message["content"])
+                segments = message["segments"]
+                
                 with st.container():
-                    # Check if message contains code blocks
-                    if '```' in message["content"]:
-                        # Split by code blocks
-                        parts = re.split(r'(```[\s\S]*?```)', message["content"])
-                        
+                    if has_code(segments):
                         st.markdown('<div class="chat-message assistant-message">', unsafe_allow_html=True)
                         st.markdown('<div style="display: flex; align-items: flex-start; gap: 0.5rem;"><span style="font-size: 1.2rem;">🤖</span><div style="flex: 1; width: 100%;">', unsafe_allow_html=True)
                         
-                        for part in parts:
-                            if part.startswith('```') and part.endswith('```'):
-                                # Extract code block
-                                code_content = part[3:-3].strip()
-                                
-                                # Extract language if specified
-                                lines = code_content.split('\n', 1)
-                                if len(lines) > 0 and lines[0].strip() and not ' ' in lines[0].strip() and lines[0].strip().isalpha():
-                                    language = lines[0].strip().lower()
-                                    code = lines[1] if len(lines) > 1 else ''
-                                else:
-                                    language = 'python'
-                                    code = code_content
-                                
-                                # Display code
-                                if code.strip():
-                                    st.code(code.strip(), language=language, line_numbers=True)
+                        for segment in segments:
+                            if segment["type"] == "code":
+                                st.code(segment["code"], language=segment["language"], line_numbers=True)
                             else:
-                                # Regular text
-                                if part.strip():
-                                    # Process inline code
-                                    part = re.sub(r'`([^`]+)`', r'<code class="inline-code">\1</code>', part)
-                                    st.markdown(part, unsafe_allow_html=True)
+                                st.markdown(segment["html"], unsafe_allow_html=True)
                         
                         st.markdown('</div></div></div>', unsafe_allow_html=True)
                     else:
                         # No code blocks, just regular text
-                        content = re.sub(r'`([^`]+)`', r'<code class="inline-code">\1</code>', message["content"])
+                        content = "".join(segment["html"] for segment in segments)
                         st.markdown(f"""
                         <div class="chat-message assistant-message">
                             <div style="display: flex; align-items: flex-start; gap: 0.5rem;">
@@ -759,7 +779,9 @@ elif st.session_state.current_doc:
                 "Ask a question",
                 placeholder="How do I create a list in Python?",
                 key=f"user_input_{st.session_state.input_key}",
-                label_visibility="collapsed"
+                label_visibility="collapsed",
+                on_change=prefetch_question,
+                args=(f"user_input_{st.session_state.input_key}",)
             )
         with col2:
             send_clicked = st.button("📤 Send", use_container_width=True)
@@ -769,15 +791,19 @@ elif st.session_state.current_doc:
         # Add user message
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         
-        # Get RAG system
-        rag = st.session_state.rag_systems[st.session_state.current_doc]
-        
         # Get response with loading animation
         with st.spinner("🤔 Thinking..."):
-            response = rag.query(user_input)
+            try:
+                rag = get_rag_system(st.session_state.current_doc)
+                # Earlier turns (the new question was just appended)
+                response = rag.query(user_input, history=st.session_state.chat_history[:-1])
+            except Exception as e:
+                response = f"❌ Error: {str(e)}"
         
         # Add assistant response
-        st.session_state.chat_history.append({"role": "assistant", "content": response})
+        st.session_state.chat_history.append(
+            {"role": "assistant", "content": response, "segments": parse_answer(response)}
+        )
         
         # Clear input by incrementing key
         st.session_state.input_key += 1
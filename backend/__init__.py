@@ -4,8 +4,22 @@ DocChat AI Backend Module
 Handles documentation scraping and RAG functionality
 """
 
-from .scraper import DocumentationScraper
-from .rag import DocumentationRAG
+import importlib
 
 __all__ = ['DocumentationScraper', 'DocumentationRAG']
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+# Public classes are imported on first access, so `import backend` (and any
+# backend.* submodule) doesn't pull in langchain, qdrant-client or bs4
+_LAZY_ATTRIBUTES = {
+    'DocumentationScraper': 'backend.scraper',
+    'DocumentationRAG': 'backend.rag',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'backend' has no attribute '{name}'")
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+class CollectionCatalog:
+    """
+    Persistent record of every documentation collection indexed in Qdrant.
+
+    Stored in a small local SQLite database so the app can list and attach
+    existing collections on startup, and so get_statistics works after
+    load_existing_vector_store without re-crawling anything.
+    """
+
+    COLUMNS = [
+        'collection_name', 'source_url', 'crawled_at', 'pages_scraped',
+        'chunk_count', 'total_characters', 'has_code_examples',
+        'embedding_model', 'embedding_dimensions', 'content_hash'
+    ]
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("DOCCHAT_CATALOG_PATH", "docchat_catalog.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS collections (
+                collection_name TEXT PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                crawled_at TEXT NOT NULL,
+                pages_scraped INTEGER,
+                chunk_count INTEGER,
+                total_characters INTEGER,
+                has_code_examples INTEGER,
+                embedding_model TEXT,
+                embedding_dimensions INTEGER,
+                content_hash TEXT
+            )
+        """)
+        self._conn.commit()
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        return {column: row[column] for column in self.COLUMNS}
+
+    def record(self, collection_name: str, source_url: str, **fields) -> Dict:
+        """Insert or replace the catalog entry for a collection"""
+        entry = {column: None for column in self.COLUMNS}
+        entry.update(fields)
+        entry['collection_name'] = collection_name
+        entry['source_url'] = source_url
+        entry['crawled_at'] = entry['crawled_at'] or datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO collections ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+                [entry[column] for column in self.COLUMNS]
+            )
+            self._conn.commit()
+
+        return entry
+
+    def get(self, collection_name: str) -> Optional[Dict]:
+        """Return the catalog entry for a collection, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM collections WHERE collection_name = ?", (collection_name,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find_by_url(self, source_url: str) -> Optional[Dict]:
+        """Return the most recent catalog entry for a documentation URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM collections WHERE source_url = ? ORDER BY crawled_at DESC LIMIT 1",
+                (source_url,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self) -> List[Dict]:
+        """All indexed collections, most recently crawled first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM collections ORDER BY crawled_at DESC"
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def remove(self, collection_name: str):
+        """Forget a collection (does not touch Qdrant)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM collections WHERE collection_name = ?", (collection_name,))
+            self._conn.commit()
+
+
+_default_catalog: Optional[CollectionCatalog] = None
+
+
+def get_catalog() -> CollectionCatalog:
+    """Process-wide catalog shared by every DocumentationRAG instance"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = CollectionCatalog()
+    return _default_catalog
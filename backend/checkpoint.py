@@ -0,0 +1,98 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class IngestionCheckpoint:
+    """
+    SQLite record of the pages whose chunks are already stored in Qdrant.
+
+    One row per page with what the catalog needs at the end of the run
+    (content hash, size) and how many chunks were upserted for it;
+    chunk IDs are derived from (source, chunk index), so the row is enough
+    to know which points exist. record() commits once per indexed batch,
+    so after a crash everything recorded is really in the collection.
+    Use path=":memory:" for runs that don't need to survive a restart.
+    """
+
+    def __init__(self, path: str = ":memory:", fresh: bool = True):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if fresh:
+                self._remove_files()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                chunks INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                has_code INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def record(self, pages: Iterable[Dict]):
+        """Mark pages (url, chunks, length, has_code, content_hash) as stored"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (url, chunks, length, has_code, content_hash) "
+                "VALUES (:url, :chunks, :length, :has_code, :content_hash)",
+                list(pages)
+            )
+            self._conn.commit()
+
+    def get_settings(self) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_settings(self, settings: Dict):
+        """What the stored chunks were built with; a resume must match"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('settings', ?)",
+                               (json.dumps(settings, sort_keys=True),))
+            self._conn.commit()
+
+    def totals(self) -> Dict:
+        with self._lock:
+            pages, chunks, characters, with_code = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunks), 0), COALESCE(SUM(length), 0), "
+                "COALESCE(SUM(has_code), 0) FROM pages"
+            ).fetchone()
+        return {'pages': pages, 'chunks': chunks, 'total_characters': characters, 'has_code_examples': with_code}
+
+    def content_hashes(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT content_hash FROM pages ORDER BY url")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _remove_files(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def destroy(self):
+        """Close and delete the checkpoint"""
+        self.close()
+        if self.path != ":memory:":
+            self._remove_files()
@@ -0,0 +1,110 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from backend.llm import LLMBackend
+from backend.metrics import get_logger
+from backend.utils import count_tokens
+
+REWRITE_PROMPT = """You rewrite follow-up questions from a conversation about software documentation into standalone search queries.
+
+Given the conversation so far and the user's latest question, output a single self-contained question that includes every entity, API or topic the latest question refers to. Do not answer it. Output only the rewritten question."""
+
+# Anaphora and continuations that only make sense with earlier turns
+FOLLOW_UP_PATTERN = re.compile(
+    r"^(and|but|also|what about|how about|then|so)\b|\b(it|its|that|this|these|those|them|they|same|above|previous)\b",
+    re.IGNORECASE
+)
+
+SOURCES_FOOTER = re.compile(r"\n+---\n📚 \*\*Sources:\*\*.*$", re.DOTALL)
+
+
+def select_history(history: Optional[List[Dict]], max_tokens: int = 1500, max_messages: int = 6) -> List[Dict]:
+    """
+    Most recent chat turns that fit in a token budget, oldest first.
+    Source footers are stripped from assistant messages since they only
+    repeat URLs the model will see again in the retrieved context.
+    """
+    if not history:
+        return []
+
+    selected, used = [], 0
+    for message in reversed(history[-max_messages:]):
+        content = message["content"]
+        if message["role"] == "assistant":
+            content = SOURCES_FOOTER.sub("", content)
+        tokens = count_tokens(content)
+        if used + tokens > max_tokens:
+            break
+        selected.append({"role": message["role"], "content": content})
+        used += tokens
+
+    selected.reverse()
+    return selected
+
+
+def is_follow_up(question: str) -> bool:
+    """Heuristic: does the question lean on earlier turns?"""
+    return len(question.split()) <= 4 or bool(FOLLOW_UP_PATTERN.search(question))
+
+
+class QueryRewriter:
+    """
+    Turns follow-up questions into standalone queries for retrieval.
+
+    Uses a small, fast model and caches results per (history, question),
+    so Streamlit reruns and repeated questions never pay for a second call.
+    """
+
+    def __init__(self, llm: LLMBackend, model: str, cache_size: int = 256):
+        self.llm = llm
+        self.model = model
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, question: str, history: List[Dict]) -> str:
+        digest = hashlib.sha256()
+        for message in history:
+            digest.update(f"{message['role']}\0{message['content']}\0".encode())
+        digest.update(question.encode())
+        return digest.hexdigest()
+
+    def rewrite(self, question: str, history: List[Dict]) -> str:
+        """Standalone version of question, or question itself if no rewrite is needed"""
+        if not history or not is_follow_up(question):
+            return question
+
+        key = self._cache_key(question, history)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        transcript = "\n".join(f"{m['role'].title()}: {m['content']}" for m in history)
+        try:
+            response = self.llm.generate(
+                [
+                    {"role": "system", "content": REWRITE_PROMPT},
+                    {"role": "user", "content": f"Conversation:\n{transcript}\n\nLatest question: {question}"}
+                ],
+                model=self.model,
+                temperature=0,
+                max_tokens=100
+            )
+            rewritten = response['content'].strip().strip('"')
+        except Exception as e:
+            get_logger().warning(f"⚠️ Query rewrite failed, using original question: {str(e)}")
+            return question
+
+        # Guard against the model answering instead of rewriting
+        if not rewritten or len(rewritten) > 4 * len(question) + 200:
+            rewritten = question
+
+        with self._lock:
+            self._cache[key] = rewritten
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rewritten
@@ -0,0 +1,88 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from langchain.docstore.document import Document
+
+CORPUS_FORMAT = "docchat-corpus"
+CORPUS_VERSION = 1
+
+
+class CorpusWriter:
+    """
+    Streams scraped Documents to a gzip-compressed JSONL snapshot.
+
+    The first line is a header describing the crawl; every following line
+    is one page: {"page_content": ..., "metadata": {...}}. Pages are
+    flushed as they are written, so an interrupted crawl still leaves a
+    readable (if partial) corpus behind.
+    """
+
+    def __init__(self, path: str, base_url: str, extra: Optional[Dict] = None):
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+        header = {
+            'format': CORPUS_FORMAT,
+            'version': CORPUS_VERSION,
+            'base_url': base_url,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            **(extra or {})
+        }
+        self._write_line(header)
+
+    def _write_line(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write(self, doc: Document):
+        """Append a single page to the snapshot"""
+        self._write_line({'page_content': doc.page_content, 'metadata': doc.metadata})
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_corpus_header(path: str) -> Dict:
+    """Return the header record of a corpus snapshot"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+
+    if header.get('format') != CORPUS_FORMAT:
+        raise ValueError(f"{path} is not a DocChat corpus snapshot")
+    if header.get('version', 0) > CORPUS_VERSION:
+        raise ValueError(f"Unsupported corpus version {header['version']} in {path}")
+    return header
+
+
+def iter_corpus(path: str) -> Iterator[Document]:
+    """Lazily yield Documents from a corpus snapshot"""
+    read_corpus_header(path)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        f.readline()  # header
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield Document(page_content=record['page_content'], metadata=record['metadata'])
+        except (EOFError, json.JSONDecodeError):
+            # A crawl killed mid-write leaves a truncated stream; keep what we have
+            return
+
+
+def load_corpus(path: str) -> List[Document]:
+    """Read a whole corpus snapshot into memory"""
+    return list(iter_corpus(path))
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from backend.metrics import get_logger
+
+# Supported EMBEDDING_BACKEND values:
+#   openai - OpenAI text-embedding-3-large over the network (default)
+#   local  - sentence-transformers model on CPU, no network after download
+EMBEDDING_BACKENDS = ("openai", "local")
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+DEFAULT_LOCAL_MODEL = "BAAI/bge-small-en-v1.5"
+
+# Loaded sentence-transformers models, shared across the process
+_local_models: Dict[str, object] = {}
+_local_models_lock = threading.Lock()
+
+
+def _load_local_model(model_name: str):
+    """Load (once per process) and warm up a sentence-transformers model"""
+    with _local_models_lock:
+        if model_name not in _local_models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "EMBEDDING_BACKEND=local requires sentence-transformers. "
+                    "Install it with: pip install sentence-transformers"
+                )
+            get_logger().info(f"🧠 Loading local embedding model: {model_name}")
+            model = SentenceTransformer(model_name, device="cpu")
+            # First inference pays for lazy kernel/graph initialisation
+            model.encode(["warm-up"], normalize_embeddings=True)
+            _local_models[model_name] = model
+        return _local_models[model_name]
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    CPU embeddings from a sentence-transformers model.
+
+    Texts are encoded in batches of batch_size; with num_workers > 1 the
+    batches are spread over a thread pool (PyTorch releases the GIL during
+    inference). The model is loaded and warmed up once per process and
+    shared by every instance.
+    """
+
+    def __init__(self, model: str = DEFAULT_LOCAL_MODEL, batch_size: int = 32, num_workers: int = 1):
+        self.model = model
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = _load_local_model(self.model).encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.num_workers == 1 or len(texts) <= self.batch_size:
+            return self._encode(texts)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        vectors = []
+        for batch_vectors in self._executor.map(self._encode, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+def get_embedding_backend(backend: Optional[str] = None) -> Embeddings:
+    """
+    Build the embedding backend selected by EMBEDDING_BACKEND.
+    EMBEDDING_MODEL overrides the model name for either backend.
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "openai")).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Use one of: {', '.join(EMBEDDING_BACKENDS)}")
+
+    if backend == "local":
+        return LocalEmbeddings(
+            model=os.getenv("EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL),
+            batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "32")),
+            num_workers=int(os.getenv("EMBEDDING_WORKERS", "1"))
+        )
+
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(
+        model=os.getenv("EMBEDDING_MODEL", OPENAI_EMBEDDING_MODEL),
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+
+def embedding_model_name(embeddings: Embeddings) -> str:
+    """Identifier recorded in the catalog for an embedding backend"""
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+def warm_up_in_background(embeddings: Embeddings) -> Optional[threading.Thread]:
+    """Load a local model on a background thread so the first query doesn't wait"""
+    if not isinstance(embeddings, LocalEmbeddings):
+        return None
+    thread = threading.Thread(target=_load_local_model, args=(embeddings.model,), daemon=True)
+    thread.start()
+    return thread
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persistent embedding cache in front of any LangChain Embeddings.
+
+    Vectors are keyed by (namespace, text) in a local SQLite file, so
+    re-indexing the same corpus - e.g. while evaluating chunking settings -
+    only embeds chunks that have never been seen before. Use a namespace
+    that identifies the model and dimensions, since vectors from different
+    models must never be mixed.
+    """
+
+    def __init__(self, underlying: Embeddings, path: str, namespace: str):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.model = embedding_model_name(underlying)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode()).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = {}
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' for _ in batch)})", batch
+                ).fetchall()
+                cached.update({key: json.loads(vector) for key, vector in rows})
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.underlying.embed_documents([texts[i] for i in missing])
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(keys[i], json.dumps(vector)) for i, vector in zip(missing, vectors)]
+                )
+                self._conn.commit()
+            for i, vector in zip(missing, vectors):
+                cached[keys[i]] = vector
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,250 @@
+"""
+Retrieval quality-vs-cost evaluation for DocumentationRAG.
+
+Usage:
+    python -m backend.evaluation --corpus python-docs.jsonl.gz --questions questions.jsonl
+    python -m backend.evaluation --corpus ... --questions ... --configs configs.json --min-recall 0.8
+
+questions.jsonl holds one {"question": ..., "expected_sources": [url, ...]}
+per line. Each configuration is indexed from the stored corpus into a
+throwaway collection and scored on recall@k, MRR, average prompt tokens and
+retrieval latency. Collections live in in-memory Qdrant unless --backend
+server is given; embedded Qdrant ignores quantization, so quantized
+configurations are skipped there. Embeddings come from EMBEDDING_BACKEND,
+as in the app, and are cached on disk, so after the first run the
+evaluation needs no network access.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.catalog import CollectionCatalog
+from backend.corpus import load_corpus
+from backend.embeddings import EMBEDDING_BACKENDS, CachedEmbeddings, embedding_model_name, get_embedding_backend
+from backend.llm import FakeLLMBackend
+from backend.metrics import get_logger
+from backend.rag import DocumentationRAG
+from backend.utils import count_message_tokens
+from backend.vectorstore import get_backend
+
+DEFAULT_CONFIGS = [
+    {'name': 'default', 'chunk_size': 1500, 'chunk_overlap': 200, 'num_results': 4},
+    {'name': 'k2', 'chunk_size': 1500, 'chunk_overlap': 200, 'num_results': 2},
+    {'name': 'small-chunks', 'chunk_size': 800, 'chunk_overlap': 100, 'num_results': 4},
+    {'name': 'no-overlap', 'chunk_size': 1500, 'chunk_overlap': 0, 'num_results': 4},
+    {'name': 'dims-1024', 'chunk_size': 1500, 'chunk_overlap': 200, 'num_results': 4, 'embedding_dimensions': 1024},
+    {'name': 'scalar-int8', 'chunk_size': 1500, 'chunk_overlap': 200, 'num_results': 4, 'quantization': 'scalar'},
+    {'name': 'parent-child', 'chunk_size': 3000, 'chunk_overlap': 200, 'child_chunk_size': 400, 'num_results': 4},
+    {'name': 'page-then-chunk', 'chunk_size': 1500, 'chunk_overlap': 200, 'num_results': 4, 'page_index': True},
+]
+
+
+def load_questions(path: str) -> List[Dict]:
+    """Read evaluation questions from a JSONL file or a JSON list"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read().strip()
+
+    records = json.loads(text) if text.startswith('[') else [
+        json.loads(line) for line in text.splitlines() if line.strip()
+    ]
+
+    questions = []
+    for record in records:
+        expected = record.get('expected_sources') or record.get('expected_source')
+        if isinstance(expected, str):
+            expected = [expected]
+        if not record.get('question') or not expected:
+            raise ValueError(f"Question record needs 'question' and 'expected_sources': {record}")
+        questions.append({'question': record['question'], 'expected_sources': expected})
+    return questions
+
+
+def embedding_factory(cache_path: str, backend: Optional[str] = None) -> Callable[[Optional[int]], Embeddings]:
+    """
+    The app's embedding backend (EMBEDDING_BACKEND, EMBEDDING_MODEL) with an
+    on-disk cache, one namespace per model and dimension setting
+    """
+    def factory(dimensions: Optional[int]) -> Embeddings:
+        model = get_embedding_backend(backend)
+        if dimensions:
+            if not hasattr(model, 'dimensions'):
+                raise ValueError(f"{embedding_model_name(model)} has fixed dimensions")
+            model = model.model_copy(update={'dimensions': dimensions})
+        namespace = f"{embedding_model_name(model)}:{dimensions or 'native'}"
+        return CachedEmbeddings(model, cache_path, namespace)
+
+    return factory
+
+
+class RetrievalEvaluator:
+    """
+    Scores retrieval configurations against labelled questions.
+    Each configuration gets its own throwaway collection.
+    Configurations the setup cannot measure are skipped with a warning.
+    """
+
+    def __init__(self, documents: List[Document], questions: List[Dict],
+                 embedding_factory: Callable[[Optional[int]], Embeddings],
+                 catalog: Optional[CollectionCatalog] = None,
+                 fixed_dimensions: bool = False):
+        self.documents = documents
+        self.questions = questions
+        self.embedding_factory = embedding_factory
+        self.fixed_dimensions = fixed_dimensions
+        self.catalog = catalog or CollectionCatalog(
+            os.path.join(tempfile.mkdtemp(prefix="docchat-eval-"), "catalog.db")
+        )
+
+    def skip_reason(self, config: Dict) -> Optional[str]:
+        """Why a configuration would measure nothing here, if it would"""
+        if config.get('quantization') and get_backend() != "server":
+            return "embedded Qdrant ignores quantization; rerun with --backend server"
+        if config.get('embedding_dimensions') and self.fixed_dimensions:
+            return "the embedding model has fixed dimensions"
+        return None
+
+    def evaluate(self, config: Dict) -> Dict:
+        """Index the corpus with one configuration and score every question"""
+        k = config.get('num_results', 4)
+        rag = DocumentationRAG(
+            f"eval_{uuid.uuid4().hex[:8]}",
+            catalog=self.catalog,
+            embedding_model=self.embedding_factory(config.get('embedding_dimensions')),
+            llm=FakeLLMBackend()  # only retrieve() is used; no generation, no API key
+        )
+        rag.chunk_size = config.get('chunk_size', rag.chunk_size)
+        rag.chunk_overlap = config.get('chunk_overlap', rag.chunk_overlap)
+        rag.quantization = config.get('quantization')
+        rag.child_chunk_size = config.get('child_chunk_size')
+        rag.context_token_budget = config.get('context_token_budget', rag.context_token_budget)
+        rag.page_index = config.get('page_index', False)
+        rag.page_candidates = config.get('page_candidates', rag.page_candidates)
+
+        start = time.perf_counter()
+        rag.index_documents(self.documents, self.documents[0].metadata.get('source', ''))
+        index_seconds = time.perf_counter() - start
+
+        recalls, reciprocal_ranks, prompt_tokens, latencies = [], [], [], []
+        try:
+            for item in self.questions:
+                question, expected = item['question'], set(item['expected_sources'])
+
+                start = time.perf_counter()
+                results = rag.retrieve(question, num_results=k,
+                                       prefer_code=rag.is_code_request(question))
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                sources = [doc.metadata.get('source') for doc in results]
+                recalls.append(len(expected & set(sources)) / len(expected))
+                rank = next((i for i, source in enumerate(sources, 1) if source in expected), None)
+                reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+                messages = rag.build_messages(question, results, rag.is_code_request(question))
+                prompt_tokens.append(count_message_tokens(messages))
+        finally:
+            rag.qdrant.delete_collection(rag.collection_name)
+            for collection in (rag.parent_collection, rag.page_collection):
+                if rag.qdrant.collection_exists(collection):
+                    rag.qdrant.delete_collection(collection)
+            self.catalog.remove(rag.collection_name)
+
+        return {
+            'name': config.get('name', 'unnamed'),
+            'config': config,
+            'chunks': rag.doc_metadata.get('chunk_count'),
+            'index_seconds': round(index_seconds, 3),
+            'k': k,
+            'recall': round(statistics.mean(recalls), 4),
+            'mrr': round(statistics.mean(reciprocal_ranks), 4),
+            'avg_prompt_tokens': round(statistics.mean(prompt_tokens), 1),
+            'retrieval_p50_ms': round(statistics.median(latencies), 3),
+            'retrieval_mean_ms': round(statistics.mean(latencies), 3),
+        }
+
+    def run(self, configs: List[Dict]) -> List[Dict]:
+        results = []
+        for config in configs:
+            reason = self.skip_reason(config)
+            if reason:
+                get_logger().warning("Skipping %s: %s", config.get('name', 'unnamed'), reason)
+                continue
+            results.append(self.evaluate(config))
+        return results
+
+
+def recommend(results: List[Dict], min_recall: float) -> Optional[Dict]:
+    """
+    Cheapest configuration meeting the recall bar: fewest prompt tokens
+    (which dominate generation latency and cost), then fastest retrieval.
+    """
+    passing = [r for r in results if r['recall'] >= min_recall]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r['avg_prompt_tokens'], r['retrieval_p50_ms']))
+
+
+def format_report(results: List[Dict]) -> str:
+    lines = [f"{'config':<16}{'k':>3}{'chunks':>8}{'recall@k':>10}{'MRR':>8}{'prompt tok':>12}{'p50 ms':>9}"]
+    for r in results:
+        lines.append(
+            f"{r['name']:<16}{r['k']:>3}{r['chunks']:>8}"
+            f"{r['recall']:>10.3f}{r['mrr']:>8.3f}{r['avg_prompt_tokens']:>12.1f}{r['retrieval_p50_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, help="Corpus snapshot written by create_vector_store(corpus_path=...)")
+    parser.add_argument("--questions", required=True, help="JSONL of question/expected_sources pairs")
+    parser.add_argument("--configs", help="JSON list of configurations (default: built-in grid)")
+    parser.add_argument("--backend", choices=("memory", "server"), default="memory",
+                        help="Qdrant for the throwaway collections; quantization needs server")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS,
+                        default=os.getenv("EMBEDDING_BACKEND", "openai").lower())
+    parser.add_argument("--embedding-cache", default="docchat_embedding_cache.db")
+    parser.add_argument("--min-recall", type=float, default=0.8)
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    # Overrides .env: throwaway collections only reach a real Qdrant when asked
+    os.environ["VECTOR_STORE_BACKEND"] = args.backend
+
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs) as f:
+            configs = json.load(f)
+
+    evaluator = RetrievalEvaluator(
+        load_corpus(args.corpus),
+        load_questions(args.questions),
+        embedding_factory(args.embedding_cache, args.embedding_backend),
+        fixed_dimensions=args.embedding_backend == "local"
+    )
+    results = evaluator.run(configs)
+
+    print()
+    print(format_report(results))
+
+    best = recommend(results, args.min_recall)
+    if best:
+        print(f"\n✅ Recommended: {best['name']} (recall {best['recall']:.3f}, "
+              f"{best['avg_prompt_tokens']:.0f} prompt tokens)")
+    else:
+        print(f"\n⚠️ No configuration reached recall {args.min_recall}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from backend.metrics import IngestionMetrics
+
+# Responses worth another attempt: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of requesting a host whose circuit breaker is open"""
+
+
+class HostState:
+    """Concurrency limit, latency and breaker state for one host"""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # EWMA of successful response times
+        self.failures = 0  # consecutive failed requests (after retries)
+        self.trips = 0  # consecutive times the breaker opened
+        self.open_until = 0.0
+
+    @property
+    def half_open(self) -> bool:
+        """Cooldown over but not yet proven healthy: one probe at a time"""
+        return self.trips > 0 and time.monotonic() >= self.open_until
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Delay requested by a Retry-After header (seconds or HTTP date), if any"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveFetcher:
+    """
+    HTTP GET with retries and per-host flow control for the crawler.
+
+    - Connection errors, timeouts, 429 and 5xx responses are retried up to
+      max_retries times with full-jitter exponential backoff, or after the
+      server's Retry-After when it sends one (capped at backoff_max).
+    - Each host gets an AIMD concurrency limit: +1/limit per fast success,
+      halved on a throttled/failed request or one slower than
+      latency_target. The scheduler asks try_acquire() before handing a
+      page to a worker, so workers never sit blocked behind a slow host.
+    - failure_threshold consecutive failed requests open the host's
+      circuit breaker for cooldown seconds (doubling on every trip). While
+      open, is_open() is True, reopens_in() says for how long, and get()
+      fails fast with CircuitOpenError; afterwards a single probe request
+      decides whether it closes again. After max_trips trips in a row,
+      is_down() reports the host as down for good.
+    """
+
+    def __init__(self, session: requests.Session, timeout: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 initial_concurrency: int = 2, max_concurrency: int = 8,
+                 latency_target: float = 2.0, failure_threshold: int = 5, cooldown: float = 30.0,
+                 max_trips: int = 3, metrics: Optional[IngestionMetrics] = None):
+        self.session = session
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.initial_concurrency = max(1, min(initial_concurrency, max_concurrency))
+        self.max_concurrency = max(1, max_concurrency)
+        self.latency_target = latency_target
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.metrics = metrics or IngestionMetrics(sinks=[])
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> HostState:
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(float(self.initial_concurrency))
+        return state
+
+    def is_open(self, url: str) -> bool:
+        """True while the breaker for url's host is open (don't schedule it)"""
+        with self._lock:
+            return time.monotonic() < self._host(url).open_until
+
+    def reopens_in(self, url: str) -> float:
+        """Seconds until the open breaker for url's host lets a probe through"""
+        with self._lock:
+            return max(0.0, self._host(url).open_until - time.monotonic())
+
+    def is_down(self, url: str) -> bool:
+        """True once the breaker for url's host has opened max_trips times in a row"""
+        with self._lock:
+            return self._host(url).trips >= self.max_trips
+
+    def concurrency(self, url: str) -> int:
+        with self._lock:
+            return int(self._host(url).limit)
+
+    def try_acquire(self, url: str) -> bool:
+        """Reserve a request slot for url's host if its limit allows"""
+        with self._lock:
+            state = self._host(url)
+            if time.monotonic() < state.open_until:
+                return False
+            allowed = 1 if state.half_open else int(state.limit)
+            if state.in_flight >= allowed:
+                return False
+            state.in_flight += 1
+            return True
+
+    def release(self, url: str):
+        with self._lock:
+            state = self._host(url)
+            state.in_flight = max(0, state.in_flight - 1)
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry number attempt (0-based)"""
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _record(self, url: str, ok: bool, latency: float = 0.0):
+        """AIMD and breaker bookkeeping after one attempt"""
+        with self._lock:
+            state = self._host(url)
+            if ok:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                state.failures = 0
+                state.trips = 0
+                if latency <= self.latency_target:
+                    state.limit = min(float(self.max_concurrency), state.limit + 1 / state.limit)
+                else:
+                    state.limit = max(1.0, state.limit / 2)
+                return
+            state.limit = max(1.0, state.limit / 2)
+
+    def _record_failure(self, url: str):
+        """A request failed for good; open the breaker after too many in a row"""
+        with self._lock:
+            state = self._host(url)
+            state.failures += 1
+            if state.failures < self.failure_threshold and not state.half_open:
+                return
+            cooldown = min(self.cooldown * 2 ** state.trips, self.cooldown * 32)
+            state.open_until = time.monotonic() + cooldown
+            state.trips += 1
+            # A failed probe after the cooldown reopens the breaker at once
+            state.failures = self.failure_threshold - 1
+        self.metrics.increment('circuit_breaker_trips')
+        self.metrics.event(f"⚡ Circuit open for {urlparse(url).netloc}: pausing it for {cooldown:.0f}s",
+                           host=urlparse(url).netloc, cooldown=cooldown)
+
+    def get(self, url: str, stream: bool = False) -> requests.Response:
+        """
+        GET url, retrying transient failures. Returns the final response
+        (which may still be a 4xx) or raises a RequestException. With
+        stream=True the body is not read yet; the caller must close it.
+        """
+        if self.is_open(url):
+            raise CircuitOpenError(f"Circuit breaker open for {urlparse(url).netloc}")
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self._record(url, True, time.perf_counter() - started)
+                    return response
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Server Error for url: {url}", response=response
+                )
+                response.close()
+
+            self._record(url, False)
+            if attempt == self.max_retries:
+                break
+            delay = self.backoff(attempt, response)
+            self.metrics.increment('fetch_retries')
+            self.metrics.event(f"  ↻ Retrying {url} in {delay:.1f}s ({error})", url=url, attempt=attempt + 1)
+            time.sleep(delay)
+
+        self._record_failure(url)
+        raise error
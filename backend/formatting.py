@@ -0,0 +1,62 @@
+import re
+from typing import Dict, List
+
+# Compiled once; answers are formatted on creation and rendered from the result
+CODE_BLOCK = re.compile(r'(```[\s\S]*?```)')
+UNTAGGED_CODE_BLOCK = re.compile(r'```\n(.*?)```', re.DOTALL)
+INLINE_CODE = re.compile(r'`([^`]+)`')
+
+
+def guess_language(code: str) -> str:
+    """Best-effort language for an untagged code block ('' if unknown)"""
+    if 'import ' in code or 'def ' in code or 'class ' in code:
+        return 'python'
+    elif 'function ' in code or 'const ' in code or 'let ' in code:
+        return 'javascript'
+    elif 'interface ' in code or 'type ' in code:
+        return 'typescript'
+    elif '<' in code and '>' in code:
+        return 'html'
+    return ''
+
+
+def ensure_code_formatting(text: str) -> str:
+    """Ensure code blocks are properly formatted for syntax highlighting"""
+    return UNTAGGED_CODE_BLOCK.sub(
+        lambda match: f'```{guess_language(match.group(1))}\n{match.group(1)}```', text
+    )
+
+
+def parse_answer(text: str) -> List[Dict]:
+    """
+    Split an assistant message into render-ready segments:
+    {'type': 'text', 'html': ...} with inline code marked up, and
+    {'type': 'code', 'code': ..., 'language': ...} for fenced blocks.
+    """
+    segments = []
+    for part in CODE_BLOCK.split(text):
+        if part.startswith('```') and part.endswith('```') and len(part) >= 6:
+            code_content = part[3:-3].strip()
+
+            # Extract language if specified
+            lines = code_content.split('\n', 1)
+            first = lines[0].strip()
+            if first and ' ' not in first and first.isalpha():
+                language = first.lower()
+                code = lines[1] if len(lines) > 1 else ''
+            else:
+                language = 'python'
+                code = code_content
+
+            if code.strip():
+                segments.append({'type': 'code', 'code': code.strip(), 'language': language})
+        elif part.strip():
+            segments.append({
+                'type': 'text',
+                'html': INLINE_CODE.sub(r'<code class="inline-code">\1</code>', part)
+            })
+    return segments
+
+
+def has_code(segments: List[Dict]) -> bool:
+    return any(segment['type'] == 'code' for segment in segments)
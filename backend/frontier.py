@@ -0,0 +1,258 @@
+import hashlib
+import heapq
+import math
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+# (depth, url) as returned by Frontier.pop()
+FrontierEntry = Tuple[int, str]
+
+# DiskFrontier row states
+PENDING, POPPED, FINISHED = 0, 1, 2
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of strings.
+
+    Membership tests can return false positives (at about error_rate once
+    capacity items are added) but never false negatives, and memory stays
+    at roughly 1.2 bytes per expected item at a 1% error rate.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add_hash(self, value: int) -> bool:
+        """
+        Add an item given as a 64-bit hash (e.g. Python's hash() of it),
+        skipping the digest; returns True if it was not present before.
+        Only for in-process use, since hash() of str changes between runs.
+        """
+        h1 = value & 0xFFFFFFFFFFFFFFFF
+        h2 = ((h1 * 0x9E3779B97F4A7C15) >> 32) | 1
+        new = False
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % self.num_bits
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class MemoryFrontier:
+    """
+    In-memory crawl frontier: a priority heap of pending URLs plus the
+    set of every URL ever queued. Pages are popped shallowest first, then
+    most recently modified, then in discovery order.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, float, int, str]] = []
+        self._seen: Set[str] = set()
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def push(self, url: str, depth: int, priority: float = 0.0) -> bool:
+        """Queue url unless it was queued before; lower priority pops first"""
+        with self._lock:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+            self._sequence += 1
+            heapq.heappush(self._heap, (depth, priority, self._sequence, url))
+            return True
+
+    def pop(self) -> Optional[FrontierEntry]:
+        with self._lock:
+            if not self._heap:
+                return None
+            depth, _, _, url = heapq.heappop(self._heap)
+            return depth, url
+
+    def seen(self, url: str) -> bool:
+        """True if url has ever been queued"""
+        with self._lock:
+            return url in self._seen
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def mark_finished(self, url: str):
+        pass
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class DiskFrontier:
+    """
+    SQLite-backed crawl frontier for sites too large to track in RAM.
+
+    Every discovered URL is one row, so the queue and the visited set live
+    on disk. A Bloom filter in front of the table answers most "seen
+    before?" checks without touching SQLite; only its positives are
+    confirmed against the table, so answers stay exact.
+
+    Rows are PENDING, POPPED (handed to a worker; the page may still need
+    to be stored downstream) or FINISHED (nothing left to do for it).
+    Writes are committed every commit_every changes and on commit(), so
+    the file doubles as a crawl checkpoint: open it with fresh=False and
+    call requeue() to continue an interrupted crawl.
+    """
+
+    def __init__(self, path: str, expected_urls: int = 1_000_000, commit_every: int = 500,
+                 fresh: bool = True):
+        self.path = path
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if fresh:
+            self._remove_files()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (state, depth, priority, seq)"
+        )
+        self._conn.commit()
+
+        # Rebuild the in-memory state from rows already on disk
+        self._bloom = BloomFilter(capacity=expected_urls)
+        self._sequence = 0
+        self._pending = 0
+        for url, seq, state in self._conn.execute("SELECT url, seq, state FROM frontier"):
+            self._bloom.add(url)
+            self._sequence = max(self._sequence, seq)
+            self._pending += state == PENDING
+
+    def _maybe_commit(self):
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def _seen_locked(self, url: str) -> bool:
+        if url not in self._bloom:
+            return False
+        return self._conn.execute("SELECT 1 FROM frontier WHERE url = ?", (url,)).fetchone() is not None
+
+    def push(self, url: str, depth: int, priority: float = 0.0) -> bool:
+        """Queue url unless it was queued before; lower priority pops first"""
+        with self._lock:
+            if self._seen_locked(url):
+                return False
+            self._sequence += 1
+            self._conn.execute(
+                "INSERT INTO frontier (url, depth, priority, seq) VALUES (?, ?, ?, ?)",
+                (url, depth, priority, self._sequence)
+            )
+            self._bloom.add(url)
+            self._pending += 1
+            self._maybe_commit()
+            return True
+
+    def pop(self) -> Optional[FrontierEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, depth FROM frontier WHERE state = ? "
+                "ORDER BY depth, priority, seq LIMIT 1", (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE frontier SET state = ? WHERE url = ?", (POPPED, row[0]))
+            self._pending -= 1
+            self._maybe_commit()
+            return row[1], row[0]
+
+    def seen(self, url: str) -> bool:
+        """True if url has ever been queued"""
+        with self._lock:
+            return self._seen_locked(url)
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def mark_finished(self, url: str):
+        """A popped page that needs no refetch on resume (e.g. it had no content)"""
+        with self._lock:
+            self._conn.execute("UPDATE frontier SET state = ? WHERE url = ?", (FINISHED, url))
+            self._maybe_commit()
+
+    def requeue(self, is_done: Optional[Callable[[str], bool]] = None) -> Tuple[int, int]:
+        """
+        After an interruption: put popped pages back in the queue unless
+        is_done(url) says they were already handled. Returns
+        (pages already done, pages requeued).
+        """
+        with self._lock:
+            popped = [url for url, in self._conn.execute("SELECT url FROM frontier WHERE state = ?", (POPPED,))]
+            requeue = [url for url in popped if not (is_done and is_done(url))]
+            self._conn.executemany("UPDATE frontier SET state = ? WHERE url = ?",
+                                   [(PENDING, url) for url in requeue])
+            finished = self._conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE state = ?", (FINISHED,)
+            ).fetchone()[0]
+            self._conn.commit()
+            self._pending += len(requeue)
+            return finished + len(popped) - len(requeue), len(requeue)
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _remove_files(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def destroy(self):
+        """Close and delete the frontier database"""
+        self.close()
+        self._remove_files()
@@ -0,0 +1,170 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# openai is imported by OpenAIBackend itself, so the fake backend and
+# startup never pay for it
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# Supported LLM_BACKEND values:
+#   openai - OpenAI chat completions (default)
+#   local  - any OpenAI-compatible server at LLM_BASE_URL (vLLM, llama.cpp, Ollama, ...)
+#   fake   - deterministic offline responses for tests and benchmarks
+LLM_BACKENDS = ("openai", "local", "fake")
+
+
+class LLMBackend(ABC):
+    """
+    Interface for chat generation.
+
+    generate() returns {'content': str, 'model': str, 'usage': {...}} where
+    usage holds prompt_tokens, completion_tokens and cached_tokens when
+    the provider reports them.
+    """
+
+    @abstractmethod
+    def generate(self, messages: List[Dict], model: str, temperature: float = 0.1,
+                 max_tokens: int = 2000) -> Dict:
+        """Complete the chat and return the response dict described above"""
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI chat completions, or an OpenAI-compatible server via base_url"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 client: Optional["OpenAI"] = None):
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=api_key, base_url=base_url)
+        self.client = client
+
+    def generate(self, messages: List[Dict], model: str, temperature: float = 0.1,
+                 max_tokens: int = 2000) -> Dict:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+        usage = {}
+        if getattr(response, 'usage', None):
+            details = getattr(response.usage, 'prompt_tokens_details', None)
+            usage = {
+                'prompt_tokens': response.usage.prompt_tokens,
+                'completion_tokens': response.usage.completion_tokens,
+                'cached_tokens': getattr(details, 'cached_tokens', 0) or 0
+            }
+
+        return {
+            'content': response.choices[0].message.content,
+            'model': getattr(response, 'model', model),
+            'usage': usage
+        }
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic stand-in that never touches the network.
+    Echoes the question and the first context source so tests can assert
+    on what was retrieved (follow-up rewrites are returned unchanged);
+    every request is kept in self.requests.
+    """
+
+    def __init__(self):
+        self.requests: List[Dict] = []
+
+    def generate(self, messages: List[Dict], model: str, temperature: float = 0.1,
+                 max_tokens: int = 2000) -> Dict:
+        self.requests.append({'messages': messages, 'model': model, 'max_tokens': max_tokens})
+
+        prompt = "\n".join(message['content'] for message in messages)
+        question = messages[-1]['content']
+
+        # Follow-up rewrite requests: return the latest question unchanged
+        marker = question.rfind('Latest question: ')
+        if marker != -1:
+            content = question[marker + len('Latest question: '):]
+            return {'content': content, 'model': model,
+                    'usage': {'prompt_tokens': len(prompt.split()),
+                              'completion_tokens': len(content.split()), 'cached_tokens': 0}}
+
+        marker = question.rfind('**Question:** ')
+        if marker != -1:
+            question = question[marker + len('**Question:** '):]
+        source = re.search(r'🔗 URL: (\S+)', prompt)
+        content = (
+            f"Answer to: {question}\n\n"
+            f"See {source.group(1) if source else 'the documentation'}.\n\n"
+            "```\nimport example\nexample.run()\n```\n"
+        )
+
+        prompt_tokens = len(prompt.split())
+        return {
+            'content': content,
+            'model': model,
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(content.split()),
+                'cached_tokens': 0
+            }
+        }
+
+
+def get_llm_backend(backend: Optional[str] = None) -> LLMBackend:
+    """Build the generation backend selected by LLM_BACKEND"""
+    backend = (backend or os.getenv("LLM_BACKEND", "openai")).lower()
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}'. Use one of: {', '.join(LLM_BACKENDS)}")
+
+    if backend == "fake":
+        return FakeLLMBackend()
+    if backend == "local":
+        return OpenAIBackend(
+            api_key=os.getenv("LLM_API_KEY", "not-needed"),
+            base_url=os.getenv("LLM_BASE_URL", "http://localhost:8000/v1")
+        )
+    return OpenAIBackend(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+class ModelRouter:
+    """
+    Picks a model per question.
+
+    Code-generation requests and long or open-ended questions go to the
+    strong model; short factual lookups go to the fast model with a
+    smaller completion budget. With routing disabled every question uses
+    the strong model, which was the original behaviour.
+    """
+
+    COMPLEX_PATTERN = re.compile(
+        r"\b(why|compare|difference|explain|design|architecture|debug|error|"
+        r"optimi[sz]e|best practice|trade-?off|migrate)"
+    )
+
+    def __init__(self, fast_model: Optional[str] = None, strong_model: Optional[str] = None,
+                 enabled: Optional[bool] = None, max_fast_words: int = 20):
+        self.fast_model = fast_model or os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+        self.strong_model = strong_model or os.getenv("LLM_STRONG_MODEL", "gpt-4")
+        if enabled is None:
+            enabled = os.getenv("LLM_ROUTING", "on").lower() not in ("off", "0", "false")
+        self.enabled = enabled
+        self.max_fast_words = max_fast_words
+
+    def route(self, question: str, is_code_request: bool) -> Dict:
+        """Return {'model', 'max_tokens', 'reason'} for a question"""
+        strong = {'model': self.strong_model, 'max_tokens': 2000}
+
+        if not self.enabled:
+            return {**strong, 'reason': 'routing disabled'}
+        if is_code_request:
+            return {**strong, 'reason': 'code request'}
+
+        if len(question.split()) > self.max_fast_words:
+            return {**strong, 'reason': 'long question'}
+        if self.COMPLEX_PATTERN.search(question.lower()):
+            return {**strong, 'reason': 'complex question'}
+
+        return {'model': self.fast_model, 'max_tokens': 800, 'reason': 'short lookup'}
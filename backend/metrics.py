@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# DOCCHAT_METRICS selects where ingestion metrics go, comma-separated:
+#   logging            - progress lines and a summary on the docchat.ingest logger (default)
+#   json:<path>        - JSON lines (events and summaries) appended to <path>
+#   prometheus:<path>  - Prometheus text exposition format, rewritten after each ingestion
+DEFAULT_SINKS = "logging"
+
+# Latency samples kept per metric for percentiles; count, sum and max stay exact
+MAX_SAMPLES = 10000
+
+# (rate name, counter, timing whose total is the denominator)
+RATES = (
+    ("pages_per_sec", "pages_fetched", "crawl_seconds"),
+    ("download_bytes_per_sec", "bytes_downloaded", "fetch_seconds"),
+    ("embedding_tokens_per_sec", "embedding_tokens", "embed_seconds"),
+    ("points_per_sec", "points_upserted", "upsert_seconds"),
+)
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time, like print() did"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def get_logger() -> logging.Logger:
+    """
+    The docchat.ingest logger. Without any logging configuration it
+    prints plain messages to stdout; configure logging to route it elsewhere.
+    """
+    logger = logging.getLogger("docchat.ingest")
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = _ConsoleHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class MetricsSink:
+    """Destination for ingestion events (progress lines) and summaries"""
+
+    def event(self, level: int, message: str, fields: Dict):
+        pass
+
+    def summary(self, summary: Dict):
+        pass
+
+
+class LoggingSink(MetricsSink):
+    """Progress lines and a one-line summary on a logger"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or get_logger()
+
+    def event(self, level: int, message: str, fields: Dict):
+        self.logger.log(level, message)
+
+    def summary(self, summary: Dict):
+        counters = ", ".join(f"{name}={value:g}" for name, value in summary["counters"].items())
+        timings = ", ".join(
+            f"{name} p50={stats['p50'] * 1000:.1f}ms p95={stats['p95'] * 1000:.1f}ms"
+            for name, stats in summary["timings"].items()
+        )
+        rates = ", ".join(f"{name}={value:,.1f}" for name, value in summary["rates"].items())
+        self.logger.info(f"📊 Ingestion metrics: {counters}")
+        if timings:
+            self.logger.info(f"   Latency: {timings}")
+        if rates:
+            self.logger.info(f"   Throughput: {rates}")
+
+
+class JSONFileSink(MetricsSink):
+    """Appends every event and summary to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def event(self, level: int, message: str, fields: Dict):
+        self._write({
+            "type": "event",
+            "time": datetime.now(timezone.utc).isoformat(),
+            "level": logging.getLevelName(level),
+            "message": message,
+            **fields
+        })
+
+    def summary(self, summary: Dict):
+        self._write({"type": "summary", "time": datetime.now(timezone.utc).isoformat(), **summary})
+
+
+class PrometheusTextSink(MetricsSink):
+    """
+    Writes the latest summary in Prometheus text exposition format, e.g.
+    for the node_exporter textfile collector. The file is replaced atomically.
+    """
+
+    def __init__(self, path: str, prefix: str = "docchat_ingest"):
+        self.path = path
+        self.prefix = prefix
+
+    def summary(self, summary: Dict):
+        lines = []
+        for name, value in summary["counters"].items():
+            metric = f"{self.prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        for name, stats in summary["timings"].items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95")):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {stats[key]:.6f}')
+            lines += [f"{metric}_sum {stats['total']:.6f}", f"{metric}_count {stats['count']}"]
+        for name, value in summary["rates"].items():
+            metric = f"{self.prefix}_{name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value:.6f}"]
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+def get_metrics_sinks(spec: Optional[str] = None) -> List[MetricsSink]:
+    """Build the sinks listed in DOCCHAT_METRICS (or spec)"""
+    sinks = []
+    for entry in (spec if spec is not None else os.getenv("DOCCHAT_METRICS", DEFAULT_SINKS)).split(","):
+        kind, _, path = entry.strip().partition(":")
+        if not kind:
+            continue
+        if kind == "logging":
+            sinks.append(LoggingSink())
+        elif kind == "json" and path:
+            sinks.append(JSONFileSink(path))
+        elif kind == "prometheus" and path:
+            sinks.append(PrometheusTextSink(path))
+        else:
+            raise ValueError(
+                f"Unknown metrics sink '{entry}'. Use logging, json:<path> or prometheus:<path>"
+            )
+    return sinks
+
+
+class IngestionMetrics:
+    """
+    Thread-safe counters and latency samples for one ingestion run.
+
+    Crawl workers and the indexing pipeline record into the same instance;
+    event() replaces progress print()s, and flush() sends a summary with
+    percentiles and derived throughput to every sink, then starts over.
+    """
+
+    def __init__(self, sinks: Optional[List[MetricsSink]] = None):
+        self.sinks = sinks if sinks is not None else get_metrics_sinks()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[str, float] = defaultdict(float)
+            self.timings: Dict[str, Dict] = {}
+
+    def increment(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, name: str, seconds: float):
+        """Record one latency sample (reservoir-sampled beyond MAX_SAMPLES)"""
+        with self._lock:
+            stats = self.timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "samples": []})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            if len(stats["samples"]) < MAX_SAMPLES:
+                stats["samples"].append(seconds)
+            else:
+                slot = random.randrange(stats["count"])
+                if slot < MAX_SAMPLES:
+                    stats["samples"][slot] = seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def event(self, message: str, level: int = logging.INFO, **fields):
+        """A progress line with optional structured fields"""
+        for sink in self.sinks:
+            sink.event(level, message, fields)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {}
+            for name, stats in self.timings.items():
+                samples = sorted(stats["samples"])
+                timings[name] = {
+                    "count": stats["count"],
+                    "total": stats["total"],
+                    "mean": stats["total"] / stats["count"],
+                    "p50": samples[int(0.50 * (len(samples) - 1))],
+                    "p95": samples[int(0.95 * (len(samples) - 1))],
+                    "max": stats["max"],
+                }
+
+        rates = {}
+        for rate, counter, timing in RATES:
+            if counters.get(counter) and timings.get(timing, {}).get("total"):
+                rates[rate] = counters[counter] / timings[timing]["total"]
+        return {"counters": counters, "timings": timings, "rates": rates}
+
+    def flush(self) -> Dict:
+        """Send the summary to every sink and reset; returns the summary"""
+        summary = self.summary()
+        for sink in self.sinks:
+            try:
+                sink.summary(summary)
+            except Exception as e:
+                get_logger().warning(f"⚠️ Metrics sink {type(sink).__name__} failed: {str(e)}")
+        self.reset()
+        return summary
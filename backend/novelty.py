@@ -0,0 +1,83 @@
+import re
+from collections import deque
+from typing import Deque
+
+from backend.frontier import BloomFilter
+
+WORD = re.compile(r"\w+")
+
+
+class NoveltyTracker:
+    """
+    Marginal value of each crawled page, for an adaptive crawl budget.
+
+    A page's novelty is the fraction of its word shingles (shingle_size
+    consecutive words, 1 in sample_rate kept) not seen on any earlier
+    page; seen shingles live in a Bloom filter, so memory stays fixed. Link
+    yield is how many new links the page added to the frontier.
+
+    - is_duplicate(): at most duplicate_novelty new content; the page is
+      not worth embedding.
+    - is_low(): little new content and few new links; links found on it
+      are pushed depth_penalty levels deeper, so that branch is crawled
+      only after everything more promising.
+    - exhausted: over the last window pages (once min_pages were seen) the
+      mean novelty fell below min_novelty and the mean link yield below
+      min_link_yield, i.e. the crawl is mostly re-reading known content
+      and not discovering new areas either; stop early.
+    """
+
+    def __init__(self, shingle_size: int = 5, sample_rate: int = 4,
+                 min_novelty: float = 0.1, min_link_yield: float = 1.0,
+                 duplicate_novelty: float = 0.02, window: int = 50, min_pages: int = 50,
+                 depth_penalty: int = 2, expected_shingles: int = 2_000_000):
+        self.shingle_size = shingle_size
+        self.sample_rate = max(1, sample_rate)
+        self.min_novelty = min_novelty
+        self.min_link_yield = min_link_yield
+        self.duplicate_novelty = duplicate_novelty
+        self.window = window
+        self.min_pages = min_pages
+        self.depth_penalty = depth_penalty
+        self._seen = BloomFilter(capacity=expected_shingles)
+        self._recent_novelty: Deque[float] = deque(maxlen=window)
+        self._recent_links: Deque[int] = deque(maxlen=window)
+        self.pages = 0
+
+    def observe(self, text: str, new_links: int) -> float:
+        """Record a page; returns its novelty in [0, 1]"""
+        words = WORD.findall(text.lower())
+        size = self.shingle_size
+        total = new = 0
+        for start in range(max(1, len(words) - size + 1)):
+            shingle = hash(tuple(words[start:start + size]))
+            if shingle % self.sample_rate == 0:
+                total += 1
+                new += self._seen.add_hash(shingle)
+        # Too short to judge: count it as new
+        novelty = new / total if total >= 10 else 1.0
+
+        self.pages += 1
+        self._recent_novelty.append(novelty)
+        self._recent_links.append(new_links)
+        return novelty
+
+    def is_duplicate(self, novelty: float) -> bool:
+        return novelty <= self.duplicate_novelty
+
+    def is_low(self, novelty: float, new_links: int) -> bool:
+        return novelty < self.min_novelty and new_links < self.min_link_yield
+
+    @property
+    def recent_novelty(self) -> float:
+        return sum(self._recent_novelty) / len(self._recent_novelty) if self._recent_novelty else 1.0
+
+    @property
+    def recent_link_yield(self) -> float:
+        return sum(self._recent_links) / len(self._recent_links) if self._recent_links else 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return (self.pages >= max(self.min_pages, self.window) and
+                self.recent_novelty < self.min_novelty and
+                self.recent_link_yield < self.min_link_yield)
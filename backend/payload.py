@@ -0,0 +1,84 @@
+import base64
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional
+
+# zstandard is optional; without it new collections use zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("zstd", "zlib")
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+
+# zstd contexts are costly to create and not thread-safe: one pair per thread
+_zstd = threading.local()
+
+
+def _zstd_compressor():
+    if not hasattr(_zstd, "compressor"):
+        _zstd.compressor = zstandard.ZstdCompressor(level=3)
+    return _zstd.compressor
+
+
+def _zstd_decompressor():
+    if not hasattr(_zstd, "decompressor"):
+        _zstd.decompressor = zstandard.ZstdDecompressor()
+    return _zstd.decompressor
+
+
+def encode_text(text: str, codec: Optional[str] = DEFAULT_CODEC) -> Dict:
+    """
+    Payload fields holding a chunk's text. With a codec the text is
+    compressed and base64-encoded (Qdrant payloads are JSON) under `text`,
+    with the codec name under `codec`; without one it is stored as plain
+    `page_content`, the layout LangChain's QdrantVectorStore reads.
+    """
+    if codec is None:
+        return {'page_content': text}
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Payload codec 'zstd' needs the zstandard package (pip install zstandard)")
+        data = _zstd_compressor().compress(text.encode())
+    elif codec == "zlib":
+        data = zlib.compress(text.encode(), 6)
+    else:
+        raise ValueError(f"Unknown payload codec '{codec}'. Use one of: {', '.join(CODECS)}")
+    return {'text': base64.b64encode(data).decode('ascii'), 'codec': codec}
+
+
+def decode_text(payload: Dict) -> str:
+    """A chunk's text from a payload written by encode_text (either layout)"""
+    if 'text' not in payload:
+        return payload.get('page_content', '')
+    data = base64.b64decode(payload['text'])
+    codec = payload.get('codec')
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("This collection's text is zstd-compressed; install the zstandard package")
+        return _zstd_decompressor().decompress(data).decode()
+    if codec == "zlib":
+        return zlib.decompress(data).decode()
+    raise ValueError(f"Unknown payload codec '{codec}'")
+
+
+@lru_cache(maxsize=None)
+def decoding_vector_store_class():
+    """
+    QdrantVectorStore whose search results decode text in either payload
+    layout, so the LangChain view also reads compressed collections.
+    Built on first use; langchain_qdrant is slow to import.
+    """
+    from langchain_qdrant import QdrantVectorStore
+
+    class DecodingQdrantVectorStore(QdrantVectorStore):
+        @classmethod
+        def _document_from_point(cls, scored_point, collection_name, content_payload_key, metadata_payload_key):
+            doc = super()._document_from_point(scored_point, collection_name,
+                                               content_payload_key, metadata_payload_key)
+            doc.page_content = decode_text(scored_point.payload or {})
+            return doc
+
+    return DecodingQdrantVectorStore
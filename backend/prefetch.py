@@ -0,0 +1,120 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+
+WHITESPACE = re.compile(r"\s+")
+TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_question(question: str) -> str:
+    """Case, whitespace and trailing punctuation do not change retrieval"""
+    return TRAILING_PUNCTUATION.sub("", WHITESPACE.sub(" ", question.strip().lower()))
+
+
+class RetrievalPrefetcher:
+    """
+    Runs retrieval for a question before it is submitted.
+
+    prefetch() starts a background search keyed by the normalized question
+    and its retrieval options; take() hands back that result when the
+    submitted question is the same, or the prefetched text followed by a
+    few more words (at most max_tail of the final question's characters),
+    waiting for a search that is still running. Merely similar questions
+    ("sort a list" / "sort a dict", "3.11" / "3.12") never match.
+    Entries expire after ttl seconds and at most max_entries are kept.
+    """
+
+    def __init__(self, retrieve: Callable[..., List[Document]], max_entries: int = 8,
+                 ttl: float = 120.0, max_tail: float = 0.2, workers: int = 2):
+        self.retrieve = retrieve
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_tail = max_tail
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._entries: "OrderedDict[Tuple, Tuple[float, Future]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _options_key(num_results: int, filters: Optional[Dict], prefer_code: bool) -> Tuple:
+        filter_items = tuple(sorted(
+            (field, tuple(value) if isinstance(value, list) else value)
+            for field, value in (filters or {}).items()
+        ))
+        return (num_results, filter_items, prefer_code)
+
+    def _expire(self, now: float):
+        for key in [key for key, (started, _) in self._entries.items() if now - started > self.ttl]:
+            del self._entries[key]
+
+    def prefetch(self, question: str, num_results: int = 4, filters: Optional[Dict] = None,
+                 prefer_code: bool = False) -> bool:
+        """Start a background search; False if one is already cached or the text is empty"""
+        text = normalize_question(question)
+        if not text:
+            return False
+
+        key = (text, self._options_key(num_results, filters, prefer_code))
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return False
+
+            future = self._executor.submit(
+                self.retrieve, question, num_results=num_results,
+                filters=filters, prefer_code=prefer_code
+            )
+            self._entries[key] = (now, future)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def _match(self, text: str, options: Tuple) -> Optional[Future]:
+        entry = self._entries.get((text, options))
+        if entry:
+            return entry[1]
+
+        # The question as typed when it was prefetched, plus whole extra words
+        best, best_length = None, 0
+        for (candidate, candidate_options), (_, future) in self._entries.items():
+            if candidate_options != options or len(candidate) <= best_length:
+                continue
+            if (text.startswith(candidate + " ")
+                    and len(text) - len(candidate) <= self.max_tail * len(text)):
+                best, best_length = future, len(candidate)
+        return best
+
+    def take(self, question: str, num_results: int = 4, filters: Optional[Dict] = None,
+             prefer_code: bool = False, timeout: Optional[float] = None) -> Optional[List[Document]]:
+        """Prefetched results for question, or None if nothing usable was prefetched"""
+        text = normalize_question(question)
+        with self._lock:
+            self._expire(time.monotonic())
+            future = self._match(text, self._options_key(num_results, filters, prefer_code))
+
+        if future is None:
+            self.misses += 1
+            return None
+        try:
+            results = future.result(timeout=timeout)
+        except Exception:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return list(results)
+
+    def clear(self):
+        """Drop every entry, e.g. after the underlying collection changed"""
+        with self._lock:
+            for _, future in self._entries.values():
+                future.cancel()
+            self._entries.clear()
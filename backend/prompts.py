@@ -0,0 +1,63 @@
+from functools import lru_cache
+from typing import Dict, List
+
+from backend.utils import count_tokens
+
+# Bump whenever SYSTEM_PROMPT changes, so cached prefixes and recorded
+# token statistics can be attributed to the right prompt
+PROMPT_VERSION = "2"
+
+# Fixed instruction prefix. It never contains per-query text, so it stays
+# byte-identical across requests and provider-side prompt caching can
+# reuse it; retrieved context and the question follow in the user turn.
+SYSTEM_PROMPT = """You are DocChat AI, an expert documentation assistant. Your role is to provide accurate, helpful answers based on the provided documentation context.
+
+**Guidelines:**
+1. Answer ONLY based on the provided context. If the information isn't in the context, say so clearly.
+2. When providing code examples:
+   - Use proper syntax highlighting with ```language blocks
+   - Ensure code is complete and runnable
+   - Add helpful comments
+   - Show multiple approaches if relevant
+3. Always cite which source(s) your answer comes from
+4. Structure your answer clearly with:
+   - A direct answer to the question
+   - Supporting details/explanation
+   - Code examples (if relevant)
+   - Links to the documentation for further reading
+5. Be concise but thorough
+6. If the user is asking for code, prioritize showing working examples
+
+The documentation context for each question is given in the user's message, followed by the question itself."""
+
+CODE_REQUEST_NOTE = "**Note:** The user is asking for code/implementation details. Prioritize providing clear, working code examples with explanations."
+
+
+def build_user_message(context: str, question: str, is_code_request: bool = False) -> str:
+    """Variable part of the prompt: retrieved context, then the question"""
+    parts = [f"**Context from documentation:**\n{context}"]
+    if is_code_request:
+        parts.append(CODE_REQUEST_NOTE)
+    parts.append(f"**Question:** {question}")
+    return "\n\n".join(parts)
+
+
+@lru_cache(maxsize=16)
+def prefix_tokens(prefix: str) -> int:
+    """Token count of a fixed prompt prefix, tokenized once per process"""
+    return count_tokens(prefix)
+
+
+def prompt_token_stats(messages: List[Dict]) -> Dict:
+    """
+    Per-request prompt accounting: the cacheable fixed prefix (system
+    messages) versus the variable tokens that change with every question.
+    """
+    prefix = sum(prefix_tokens(m["content"]) for m in messages if m["role"] == "system")
+    variable = sum(count_tokens(m["content"]) for m in messages if m["role"] != "system")
+    return {
+        'prompt_version': PROMPT_VERSION,
+        'prefix_tokens': prefix,
+        'variable_tokens': variable,
+        'total_tokens': prefix + variable
+    }
@@ -1,14 +1,34 @@
 import os
-from typing import List, Optional, Dict
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
+import hashlib
+import uuid
+import logging
+from collections import defaultdict
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, List, Optional, Dict
 from langchain.docstore.document import Document
-from openai import OpenAI
-from backend.scraper import DocumentationScraper
-import re
+from langchain_core.embeddings import Embeddings
+from backend.checkpoint import IngestionCheckpoint
+from backend.corpus import CorpusWriter, iter_corpus, read_corpus_header
+from backend.catalog import CollectionCatalog, get_catalog
+from backend.vectorstore import get_qdrant_client, is_embedded
+from backend.embeddings import embedding_model_name, get_embedding_backend
+from backend.metrics import IngestionMetrics
+from backend.payload import DEFAULT_CODEC, decode_text, decoding_vector_store_class, encode_text
+from backend.utils import count_tokens
+from backend.llm import LLMBackend, ModelRouter, get_llm_backend
+from backend.conversation import QueryRewriter, is_follow_up, select_history
+from backend.prefetch import RetrievalPrefetcher
+from backend.formatting import ensure_code_formatting
+from backend.prompts import SYSTEM_PROMPT, build_user_message, prompt_token_stats
 from dotenv import load_dotenv
 
+# langchain_qdrant, qdrant_client, the text splitter and the scraper's
+# requests/bs4 stack are imported where they are first used, so importing
+# this module (and starting the app) stays fast
+if TYPE_CHECKING:
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import models
+
 # Load environment variables
 load_dotenv()
 
@@ -18,91 +38,611 @@ class DocumentationRAG:
     Manages vector storage, retrieval, and AI-powered Q&A.
     """
     
-    def __init__(self, collection_name: str = "docs_vectors"):
+    # Metadata fields that can be used in `filters` (Qdrant PayloadSchemaType values)
+    PAYLOAD_INDEXES = {
+        'source': 'keyword',
+        'title': 'keyword',
+        'has_code': 'bool'
+    }
+    
+    # Metadata stored in point payloads: the filterable fields and the parent
+    # link. The rest of the scraper's metadata is only needed at ingestion
+    PAYLOAD_FIELDS = (*PAYLOAD_INDEXES, 'parent_id')
+    
+    CODE_KEYWORDS = [
+        'code', 'example', 'how to', 'implement', 'write', 'create',
+        'function', 'class', 'method', 'syntax', 'snippet'
+    ]
+    
+    def __init__(self, collection_name: str = "docs_vectors",
+                 catalog: Optional[CollectionCatalog] = None,
+                 embedding_model: Optional[Embeddings] = None,
+                 llm: Optional[LLMBackend] = None,
+                 router: Optional[ModelRouter] = None,
+                 metrics: Optional[IngestionMetrics] = None):
         self.collection_name = collection_name
-        self.embedding_model = OpenAIEmbeddings(
-            model="text-embedding-3-large",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # EMBEDDING_BACKEND picks OpenAI or a local CPU model
+        self.embedding_model = embedding_model or get_embedding_backend()
+        # LLM_BACKEND picks OpenAI, a local OpenAI-compatible server or a fake
+        self.llm = llm or get_llm_backend()
+        self.router = router or ModelRouter()
+        self.last_route: Dict = {}
+        self.last_prompt_stats: Dict = {}
+        
+        # Multi-turn support: bounded history and follow-up rewriting
+        self.history_token_budget = 1500
+        self.rewriter = QueryRewriter(self.llm, self.router.fast_model)
+        self.last_search_question = ""
+        
+        # Speculative retrieval for questions that are still being typed
+        self.prefetcher = RetrievalPrefetcher(self.retrieve)
         self.vector_store = None
         self.doc_metadata = {}
+        self.catalog = catalog or get_catalog()
+        self.qdrant = get_qdrant_client()
+        self.embedded_store = is_embedded(self.qdrant)
+        
+        # Ingestion settings
+        self.chunk_size = 1500  # Optimal size for context
+        self.chunk_overlap = 200  # Overlap for continuity
+        # Parent-child indexing: when set, each chunk is split again into
+        # child chunks of this size, which are what gets embedded; searches
+        # match children and return their (deduplicated) parent chunks
+        self.child_chunk_size: Optional[int] = None
+        self.child_chunk_overlap = 50
+        self.child_fanout = 3  # Child hits fetched per requested parent
+        self.context_token_budget = 2000  # Max tokens of parent chunks per search
+        self.parent_child = False  # Whether the current collection has a parent store
+        # Two-stage retrieval for very large collections: one vector per page
+        # (the mean of its chunk vectors) picks page_candidates pages first,
+        # and the chunk search only runs within those pages
+        self.page_index = False
+        self.page_candidates = 10
+        self.hierarchical = False  # Whether the current collection has page vectors
+        self.quantization: Optional[str] = None  # None, 'scalar' or 'binary'
+        self.payload_codec: Optional[str] = DEFAULT_CODEC  # 'zstd', 'zlib' or None for plain text
+        self.ingest_batch_pages = 200  # Pages chunked, embedded and stored per batch
+        # Bulk writes go through upload_points: points per request, and worker
+        # processes (each with its own connection) on the server backend
+        self.upload_batch_size = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "256"))
+        self.upload_parallel = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "1"))
+        # Crawl and ingestion checkpoints, kept until a run completes
+        self.state_dir = os.getenv("DOCCHAT_CRAWL_STATE_DIR", "crawl_state")
+        
+        # Per-stage ingestion metrics, sent to the DOCCHAT_METRICS sinks
+        self.metrics = metrics or IngestionMetrics()
+        self.last_ingestion_metrics: Dict = {}
     
-    def create_vector_store(self, documentation_url: str, max_pages: int = 50):
+    def create_vector_store(self, documentation_url: str, max_pages: int = 50,
+                            corpus_path: Optional[str] = None,
+                            large_site: Optional[bool] = None, resume: bool = False):
         """
         Create vector store from documentation website.
         This is the main entry point for indexing new documentation.
+        
+        Pages stream from the crawler straight into ingestion, batch by
+        batch, so memory does not grow with the size of the site.
+        If corpus_path is given, the scraped pages are also streamed to an
+        offline snapshot so the index can later be rebuilt with
+        create_vector_store_from_corpus without crawling again.
+        large_site forces the scraper's disk-backed frontier on or off
+        (by default it is used from DocumentationScraper.LARGE_SITE_PAGES).
+        
+        The crawl frontier and the set of stored pages are checkpointed
+        under state_dir while the run is in progress. If it is interrupted,
+        call again with resume=True to continue where it stopped instead of
+        crawling and embedding everything again.
         """
-        print(f"🚀 Starting documentation ingestion for: {documentation_url}")
+        if resume and corpus_path:
+            raise ValueError("corpus_path cannot be used with resume: the snapshot would miss "
+                             "the pages stored before the interruption")
+        
+        self.metrics.reset()
+        self.metrics.event(f"🚀 Starting documentation ingestion for: {documentation_url}",
+                           base_url=documentation_url)
+        
+        from backend.scraper import DocumentationScraper
         
         # Step 1: Scrape documentation
-        scraper = DocumentationScraper(documentation_url, max_pages)
-        documents = scraper.scrape_documentation()
+        checkpoint = IngestionCheckpoint(self.checkpoint_path, fresh=not resume)
+        if resume and not len(checkpoint):
+            # Nothing was stored before: there is nothing to resume, and the
+            # old crawl frontier may have finished pages that were never stored
+            resume = False
+        scraper = DocumentationScraper(documentation_url, max_pages, metrics=self.metrics,
+                                       large_site=large_site, state_dir=self.state_dir,
+                                       checkpoint=True, resume=resume)
+        documents = None
+        try:
+            if corpus_path:
+                with CorpusWriter(corpus_path, documentation_url) as writer:
+                    documents = scraper.iter_documentation(corpus_writer=writer, is_done=checkpoint.__contains__)
+                    vector_store = self.index_documents(documents, documentation_url, checkpoint)
+                self.metrics.event(f"💾 Saved corpus snapshot: {corpus_path} ({writer.count} pages)")
+            else:
+                documents = scraper.iter_documentation(is_done=checkpoint.__contains__)
+                vector_store = self.index_documents(documents, documentation_url, checkpoint)
+        except Exception:
+            if not len(checkpoint):
+                # Nothing was stored, so leave nothing behind: the next
+                # attempt for this URL starts from scratch
+                if documents is not None:
+                    documents.close()
+                scraper.clear_checkpoint()
+                checkpoint.destroy()
+            raise
         
-        if not documents:
-            raise ValueError("No documents were scraped. Please check the URL and try again.")
+        if scraper.host_unavailable:
+            # The crawl stopped early; keep both checkpoints for resume=True
+            self.metrics.event("⏸ Indexed what was crawled before the site became unavailable. "
+                               "Process it again later to resume the crawl.", logging.WARNING)
+            checkpoint.close()
+            return vector_store
         
-        # Store metadata about this documentation
-        self.doc_metadata = {
+        # Everything is stored; nothing left to resume
+        scraper.clear_checkpoint()
+        checkpoint.destroy()
+        return vector_store
+    
+    def create_vector_store_from_corpus(self, corpus_path: str, resume: bool = False):
+        """
+        Rebuild the vector store from an offline corpus snapshot.
+        No pages are fetched, so chunking or embedding changes can be
+        re-indexed without crawling the site again. With resume=True,
+        pages stored by an interrupted run are skipped.
+        """
+        header = read_corpus_header(corpus_path)
+        self.metrics.reset()
+        self.metrics.event(f"📦 Indexing corpus snapshot: {corpus_path} (crawled {header.get('created_at', 'unknown')})")
+        
+        checkpoint = IngestionCheckpoint(self.checkpoint_path, fresh=not resume)
+        vector_store = self.index_documents(iter_corpus(corpus_path), header.get('base_url', ''), checkpoint)
+        checkpoint.destroy()
+        return vector_store
+    
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.state_dir, f"{self.collection_name}.ingest.db")
+    
+    def has_checkpoint(self) -> bool:
+        """True if an interrupted ingestion into this collection stored any pages"""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        checkpoint = IngestionCheckpoint(self.checkpoint_path, fresh=False)
+        try:
+            return len(checkpoint) > 0
+        finally:
+            checkpoint.close()
+    
+    def can_resume(self, documentation_url: str) -> bool:
+        """
+        True if create_vector_store(documentation_url, resume=True) would
+        continue an interrupted run: its checkpoint has stored pages, was
+        made with the current settings and its collections still exist.
+        """
+        if not self.has_checkpoint():
+            return False
+        checkpoint = IngestionCheckpoint(self.checkpoint_path, fresh=False)
+        try:
+            problem = self._resume_problem(checkpoint, self._ingest_settings(documentation_url))
+        finally:
+            checkpoint.close()
+        if problem:
+            self.metrics.event(f"♻️ Not resuming the earlier run: {problem}")
+        return problem is None
+    
+    def _ingest_settings(self, documentation_url: str) -> Dict:
+        """What chunks are built with; a resumed run must use the same"""
+        return {
             'url': documentation_url,
-            'pages_scraped': len(documents),
-            'total_characters': sum(doc.metadata['length'] for doc in documents),
-            'has_code_examples': sum(1 for doc in documents if doc.metadata.get('has_code', False))
+            'chunk_size': self.chunk_size,
+            'chunk_overlap': self.chunk_overlap,
+            'child_chunk_size': self.child_chunk_size,
+            'page_index': self.page_index,
+            'embedding_model': embedding_model_name(self.embedding_model)
         }
+    
+    def _resume_problem(self, checkpoint: IngestionCheckpoint, settings: Dict) -> Optional[str]:
+        """Why the points recorded in checkpoint can't be built on, if they can't"""
+        if checkpoint.get_settings() != settings:
+            return "the checkpoint was made with a different URL, chunking or embedding model."
+        if not self.qdrant.collection_exists(self.collection_name):
+            return f"collection {self.collection_name} no longer exists."
+        if settings['child_chunk_size'] and not self.qdrant.collection_exists(self.parent_collection):
+            return f"parent store {self.parent_collection} no longer exists."
+        if settings['page_index'] and not self.qdrant.collection_exists(self.page_collection):
+            return f"page index {self.page_collection} no longer exists."
+        return None
+    
+    def index_documents(self, documents: Iterable[Document], documentation_url: str,
+                        checkpoint: Optional[IngestionCheckpoint] = None):
+        """
+        Chunk, embed and store already-scraped documents.
+        
+        documents may be a list or a stream (e.g. from iter_documentation
+        or iter_corpus); it is consumed ingest_batch_pages pages at a time,
+        so only one batch of pages, chunks and vectors is held in memory.
+        Ends the ingestion run: the metrics summary is flushed to the sinks
+        and kept in last_ingestion_metrics.
+        
+        Each stored batch is recorded in checkpoint. If the checkpoint
+        already has pages (a resumed run), the collection is kept and the
+        pages recorded there are skipped.
+        """
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         
         # Step 2: Split documents into chunks
         text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,  # Optimal size for context
-            chunk_overlap=200,  # Overlap for continuity
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             separators=["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""],
             length_function=len
         )
+        child_splitter = None
+        if self.child_chunk_size:
+            child_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.child_chunk_size,
+                chunk_overlap=self.child_chunk_overlap,
+                separators=["\n\n", "\n", ". ", "! ", "? ", ", ", " ", ""],
+                length_function=len
+            )
         
-        split_docs = text_splitter.split_documents(documents)
-        print(f"📄 Split into {len(split_docs)} chunks")
+        # Without a persistent checkpoint, track this run's pages in memory
+        if checkpoint is None:
+            checkpoint = IngestionCheckpoint()
+        settings = self._ingest_settings(documentation_url)
+        resuming = len(checkpoint) > 0
+        if resuming:
+            problem = self._resume_problem(checkpoint, settings)
+            if problem:
+                raise ValueError(f"Cannot resume: {problem} Start over with resume=False.")
+            self.metrics.event(f"♻️ Resuming ingestion: {len(checkpoint)} pages already stored",
+                               pages_stored=len(checkpoint))
+        else:
+            checkpoint.set_settings(settings)
+        create = not resuming
+        chunk_count = checkpoint.totals()['chunks']
         
-        # Step 3: Create vector store
-        print("🔍 Creating embeddings and vector store...")
+        # Step 3: Chunk, embed and store each batch as it arrives
+        documents = iter(documents)
+        try:
+            while True:
+                batch = list(islice(documents, self.ingest_batch_pages))
+                if not batch:
+                    break
         
-        # Qdrant connection settings
-        qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-        qdrant_api_key = os.getenv("QDRANT_API_KEY", None)
+                batch = [doc for doc in batch if doc.metadata['source'] not in checkpoint]
+                if not batch:
+                    continue
+        
+                with self.metrics.timer('split_seconds'):
+                    split_docs = text_splitter.split_documents(batch)
+                    parents = None
+                    if child_splitter:
+                        parents, split_docs = split_docs, self._split_children(split_docs, child_splitter)
+                if parents is not None:
+                    self.metrics.increment('parent_chunks', len(parents))
+                    self.metrics.increment('chunks', len(split_docs))
+                    self.metrics.event(f"📄 Split {len(batch)} pages into {len(parents)} parent and "
+                                       f"{len(split_docs)} child chunks", chunks=len(split_docs))
+                else:
+                    self.metrics.increment('chunks', len(split_docs))
+                    self.metrics.event(f"📄 Split {len(batch)} pages into {len(split_docs)} chunks",
+                                       chunks=len(split_docs))
+        
+                if split_docs:
+                    self._store_chunks(split_docs, create=create, parents=parents)
+                    create = False
+                    chunk_count += len(split_docs)
+                    self.metrics.event(f"🔍 Stored {chunk_count} chunks so far", chunks_total=chunk_count)
+        
+                # Checkpoint the batch only once its points are upserted
+                chunks_per_page = defaultdict(int)
+                for chunk in split_docs:
+                    chunks_per_page[chunk.metadata['source']] += 1
+                checkpoint.record({
+                    'url': doc.metadata['source'],
+                    'chunks': chunks_per_page[doc.metadata['source']],
+                    'length': doc.metadata['length'],
+                    'has_code': int(bool(doc.metadata.get('has_code', False))),
+                    'content_hash': doc.metadata.get('html_hash') or hashlib.sha256(doc.page_content.encode()).hexdigest()
+                } for doc in batch)
+        
+            if len(checkpoint):
+                self.parent_child = child_splitter is not None
+                self.hierarchical = self.page_index
+                self.vector_store = self._make_vector_store()
         
-        try:
-            self.vector_store = QdrantVectorStore.from_documents(
-                documents=split_docs,
-                url=qdrant_url,
-                api_key=qdrant_api_key,
-                embedding=self.embedding_model,
-                collection_name=self.collection_name,
-                force_recreate=True  # Always create fresh collection
-            )
-            
-            print("✅ Vector store created successfully!")
-            print(f"   Collection: {self.collection_name}")
-            print(f"   Documents: {len(split_docs)}")
-            
         except Exception as e:
+            self.last_ingestion_metrics = self.metrics.flush()
             raise Exception(f"Failed to create vector store: {str(e)}. Make sure Qdrant is running.")
         
+        # Store metadata about this documentation
+        totals = checkpoint.totals()
+        self.doc_metadata = {
+            'url': documentation_url,
+            'pages_scraped': totals['pages'],
+            'total_characters': totals['total_characters'],
+            'has_code_examples': totals['has_code_examples']
+        }
+        
+        if not self.doc_metadata['pages_scraped']:
+            self.last_ingestion_metrics = self.metrics.flush()
+            raise ValueError("No documents were scraped. Please check the URL and try again.")
+        
+        self.metrics.event("✅ Vector store created successfully!")
+        self.metrics.event(f"   Collection: {self.collection_name}")
+        self.metrics.event(f"   Documents: {chunk_count}")
+        
+        self._record_in_catalog(checkpoint.content_hashes(), chunk_count)
+        self.last_ingestion_metrics = self.metrics.flush()
         return self.vector_store
     
-    def load_existing_vector_store(self):
-        """Load existing vector store from Qdrant"""
-        qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-        qdrant_api_key = os.getenv("QDRANT_API_KEY", None)
+    @property
+    def parent_collection(self) -> str:
+        """Vectorless collection holding the parent chunks of a parent-child index"""
+        return f"{self.collection_name}__parents"
+    
+    @property
+    def page_collection(self) -> str:
+        """Collection holding one vector per page for two-stage retrieval"""
+        return f"{self.collection_name}__pages"
+    
+    @staticmethod
+    def _point_id(source: str, position: int) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{position}"))
+    
+    def _split_children(self, parents: List[Document], splitter) -> List[Document]:
+        """Split parent chunks into child chunks that carry their parent's point ID"""
+        positions = defaultdict(int)
+        children = []
+        for parent in parents:
+            source = parent.metadata.get('source', '')
+            parent_id = self._point_id(source, positions[source])
+            positions[source] += 1
+            children.extend(
+                Document(page_content=text, metadata={**parent.metadata, 'parent_id': parent_id})
+                for text in splitter.split_text(parent.page_content)
+            )
+        return children
+    
+    def _store_chunks(self, chunks: List[Document], create: bool = True,
+                      parents: Optional[List[Document]] = None):
+        """
+        Embed chunks and upsert them. With create, the collection is first
+        (re)created. All chunks of a page must be in the same call: point
+        IDs come from the page URL and the chunk's position in the page, so
+        storing a page again overwrites its points instead of duplicating them.
+        
+        With parents, chunks are their child chunks (see _split_children).
+        The parents are stored once, without vectors, in parent_collection,
+        before the children that point to them. With page_index, each page's
+        vector is then stored in page_collection.
+        """
+        from qdrant_client import models
+        
+        texts = [chunk.page_content for chunk in chunks]
+        with self.metrics.timer('embed_seconds'):
+            vectors = self.embedding_model.embed_documents(texts)
+        self.metrics.increment('embedding_calls')
+        self.metrics.increment('embedding_tokens', sum(count_tokens(text) for text in texts))
+        
+        # Always create fresh collection
+        if create:
+            if self.qdrant.collection_exists(self.collection_name):
+                self.qdrant.delete_collection(self.collection_name)
+            self.qdrant.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=models.VectorParams(size=len(vectors[0]), distance=models.Distance.COSINE),
+                quantization_config=self._quantization_config()
+            )
+            self._create_payload_indexes()
+            if self.qdrant.collection_exists(self.parent_collection):
+                self.qdrant.delete_collection(self.parent_collection)
+            if parents is not None:
+                self.qdrant.create_collection(collection_name=self.parent_collection, vectors_config={})
+            if self.qdrant.collection_exists(self.page_collection):
+                self.qdrant.delete_collection(self.page_collection)
+            if self.page_index:
+                self.qdrant.create_collection(
+                    collection_name=self.page_collection,
+                    vectors_config=models.VectorParams(size=len(vectors[0]), distance=models.Distance.COSINE)
+                )
+                self._create_payload_indexes(self.page_collection)
+        
+        if parents:
+            positions = defaultdict(int)
+            parent_points = []
+            for parent in parents:
+                source = parent.metadata.get('source', '')
+                parent_points.append(models.PointStruct(
+                    id=self._point_id(source, positions[source]),
+                    vector={},
+                    payload=self._payload(parent)
+                ))
+                positions[source] += 1
+            self._upload(self.parent_collection, parent_points)
+        
+        positions = defaultdict(int)
+        points = []
+        for chunk, vector in zip(chunks, vectors):
+            source = chunk.metadata.get('source', '')
+            points.append(models.PointStruct(
+                id=self._point_id(source, positions[source]),
+                vector=vector,
+                payload=self._payload(chunk)
+            ))
+            positions[source] += 1
+        self._upload(self.collection_name, points)
+        self.metrics.increment('points_upserted', len(points))
+        
+        if self.page_index:
+            self._store_page_vectors(chunks, vectors)
+    
+    def _upload(self, collection_name: str, points: List["models.PointStruct"]):
+        """
+        Bulk-write points, upload_batch_size per request and upload_parallel
+        requests at a time. Waits until Qdrant has applied them, so a batch
+        recorded in the checkpoint is really stored.
+        """
+        with self.metrics.timer('upsert_seconds'):
+            self.qdrant.upload_points(collection_name, points=points, batch_size=self.upload_batch_size,
+                                      parallel=self.upload_parallel, wait=True)
+    
+    def _payload(self, doc: Document) -> Dict:
+        """
+        Compact payload for a chunk: PAYLOAD_FIELDS of its metadata under
+        `metadata` (where filters and LangChain look for it) and its text,
+        compressed with payload_codec
+        """
+        metadata = {field: doc.metadata[field] for field in self.PAYLOAD_FIELDS if field in doc.metadata}
+        return {'metadata': metadata, **encode_text(doc.page_content, self.payload_codec)}
+    
+    def _store_page_vectors(self, chunks: List[Document], vectors: List[List[float]]):
+        """
+        One point per page: the normalized mean of its chunk vectors (no
+        extra embedding calls), its source, title and has_code (any chunk),
+        and how many chunk points the page has.
+        """
+        import numpy as np
+        from qdrant_client import models
+        
+        chunks_by_page = defaultdict(list)
+        for index, chunk in enumerate(chunks):
+            chunks_by_page[chunk.metadata.get('source', '')].append(index)
         
+        matrix = np.asarray(vectors, dtype=np.float32)
+        points = []
+        for source, indexes in chunks_by_page.items():
+            mean = matrix[indexes].mean(axis=0)
+            norm = np.linalg.norm(mean)
+            points.append(models.PointStruct(
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, source)),
+                vector=(mean / norm if norm else mean).tolist(),
+                payload={
+                    'metadata': {
+                        'source': source,
+                        'title': chunks[indexes[0]].metadata.get('title', ''),
+                        'has_code': any(chunks[i].metadata.get('has_code', False) for i in indexes)
+                    },
+                    'chunks': len(indexes)
+                }
+            ))
+        self._upload(self.page_collection, points)
+        self.metrics.increment('page_vectors', len(points))
+    
+    def _quantization_config(self) -> Optional["models.QuantizationConfig"]:
+        """Qdrant quantization settings for the configured mode"""
+        from qdrant_client import models
+        
+        if not self.quantization:
+            return None
+        if self.quantization == 'scalar':
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True)
+            )
+        if self.quantization == 'binary':
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        raise ValueError(f"Unknown quantization '{self.quantization}'. Use 'scalar' or 'binary'.")
+    
+    def _create_payload_indexes(self, collection_name: Optional[str] = None):
+        """Index the metadata fields used by filtered retrieval"""
+        from qdrant_client import models
+        
+        if self.embedded_store:
+            # Embedded Qdrant has no payload indexes (it only warns); filters still work
+            return
+        for field, schema in self.PAYLOAD_INDEXES.items():
+            try:
+                self.qdrant.create_payload_index(
+                    collection_name=collection_name or self.collection_name,
+                    field_name=f"metadata.{field}",
+                    field_schema=models.PayloadSchemaType(schema)
+                )
+            except Exception as e:
+                self.metrics.event(f"⚠️ Could not create payload index on {field}: {str(e)}", logging.WARNING)
+    
+    def _make_vector_store(self) -> "QdrantVectorStore":
+        """
+        LangChain view over the collection, sharing the process-wide client.
+        retrieve() queries Qdrant directly; the view decodes compressed text
+        on read, but texts added through it are stored uncompressed.
+        """
+        # Prefetched results belong to whatever was indexed before
+        self.prefetcher.clear()
+        return decoding_vector_store_class()(
+            client=self.qdrant,
+            collection_name=self.collection_name,
+            embedding=self.embedding_model,
+            # Skip the dummy embedding call LangChain makes to check dimensions
+            validate_collection_config=False
+        )
+    
+    def _collection_dimensions(self) -> Optional[int]:
+        """Vector size of the current collection, read from Qdrant"""
         try:
-            self.vector_store = QdrantVectorStore.from_existing_collection(
-                url=qdrant_url,
-                api_key=qdrant_api_key,
-                embedding=self.embedding_model,
-                collection_name=self.collection_name
+            info = self.qdrant.get_collection(self.collection_name)
+            vectors = info.config.params.vectors
+            if isinstance(vectors, dict):
+                vectors = next(iter(vectors.values()))
+            return vectors.size
+        except Exception:
+            return None
+    
+    def _record_in_catalog(self, page_hashes: List[str], chunk_count: int):
+        """Persist collection metadata so it survives restarts"""
+        # Order-independent fingerprint of the indexed content
+        content_hash = hashlib.sha256("".join(sorted(page_hashes)).encode()).hexdigest()
+        
+        self.doc_metadata['chunk_count'] = chunk_count
+        try:
+            entry = self.catalog.record(
+                self.collection_name,
+                self.doc_metadata['url'],
+                pages_scraped=self.doc_metadata['pages_scraped'],
+                chunk_count=chunk_count,
+                total_characters=self.doc_metadata['total_characters'],
+                has_code_examples=self.doc_metadata['has_code_examples'],
+                embedding_model=embedding_model_name(self.embedding_model),
+                embedding_dimensions=self._collection_dimensions(),
+                content_hash=content_hash
             )
-            print(f"✅ Loaded existing vector store: {self.collection_name}")
-            return self.vector_store
+            self.doc_metadata['crawled_at'] = entry['crawled_at']
+        except Exception as e:
+            self.metrics.event(f"⚠️ Could not update collection catalog: {str(e)}", logging.WARNING)
+    
+    def load_existing_vector_store(self):
+        """Load existing vector store from Qdrant"""
+        try:
+            if not self.qdrant.collection_exists(self.collection_name):
+                raise ValueError(f"Collection {self.collection_name} does not exist")
+            self.parent_child = self.qdrant.collection_exists(self.parent_collection)
+            self.hierarchical = self.qdrant.collection_exists(self.page_collection)
+            self.vector_store = self._make_vector_store()
+            self.metrics.event(f"✅ Loaded existing vector store: {self.collection_name}")
         except Exception as e:
             raise Exception(f"Failed to load vector store: {str(e)}")
+        
+        # Restore statistics recorded when the collection was built
+        entry = self.catalog.get(self.collection_name)
+        current_model = embedding_model_name(self.embedding_model)
+        if entry and entry['embedding_model'] and entry['embedding_model'] != current_model:
+            self.vector_store = None
+            raise ValueError(
+                f"Collection {self.collection_name} was embedded with {entry['embedding_model']}, "
+                f"but the current embedding backend is {current_model}. Re-index it first."
+            )
+        if entry:
+            self.doc_metadata = {
+                'url': entry['source_url'],
+                'pages_scraped': entry['pages_scraped'],
+                'total_characters': entry['total_characters'],
+                'has_code_examples': entry['has_code_examples'],
+                'chunk_count': entry['chunk_count'],
+                'crawled_at': entry['crawled_at']
+            }
+        
+        return self.vector_store
     
     def format_search_results(self, results: List[Document]) -> str:
         """Format search results for context"""
@@ -126,78 +666,286 @@ class DocumentationRAG:
         
         return "\n".join(context_parts)
     
-    def query(self, question: str, num_results: int = 4) -> str:
+    def is_code_request(self, question: str) -> bool:
+        """Determine if the question is asking for code"""
+        question = question.lower()
+        return any(keyword in question for keyword in self.CODE_KEYWORDS)
+    
+    def build_filter(self, filters: Optional[Dict]) -> Optional["models.Filter"]:
+        """
+        Turn a {'source': ..., 'title': ..., 'has_code': ...} dict into a
+        Qdrant filter. List values match any of the given values.
+        """
+        if not filters:
+            return None
+        
+        from qdrant_client import models
+        
+        conditions = []
+        for field, value in filters.items():
+            if field not in self.PAYLOAD_INDEXES:
+                raise ValueError(f"Unsupported filter field '{field}'. Use one of: {', '.join(self.PAYLOAD_INDEXES)}")
+            if isinstance(value, (list, tuple, set)):
+                match = models.MatchAny(any=list(value))
+            else:
+                match = models.MatchValue(value=value)
+            conditions.append(models.FieldCondition(key=f"metadata.{field}", match=match))
+        
+        return models.Filter(must=conditions)
+    
+    def retrieve(self, question: str, num_results: int = 4,
+                 filters: Optional[Dict] = None, prefer_code: bool = False) -> List[Document]:
+        """
+        Find the chunks most relevant to a question.
+        
+        filters narrows the search to matching metadata. With prefer_code,
+        chunks containing code examples are returned first and the rest of
+        the k slots are topped up from an unrestricted search.
+        
+        Searches return metadata only; the text of the final num_results
+        chunks is loaded at the end. In a parent-child collection the
+        search matches child chunks and returns their parent chunks
+        instead (see _parents_for). In a collection with page vectors,
+        chunks are only searched within the best-matching pages (see _search).
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized. Create or load one first.")
+        
+        # Embed once; the code-preference pass reuses the vector
+        query_vector = self.embedding_model.embed_query(question)
+        # Several children often share a parent; fetch enough to fill num_results parents
+        k = num_results * self.child_fanout if self.parent_child else num_results
+        # Without parents every hit is a final result, so its text can come with the search
+        with_text = not self.parent_child
+        
+        if not prefer_code or (filters and 'has_code' in filters):
+            results = self._search(query_vector, k, filters, with_text)
+        else:
+            results = self._search(query_vector, k, {**(filters or {}), 'has_code': True}, with_text)
+            if len(results) < k:
+                seen = {doc.metadata.get('_id') for doc in results}
+                for doc in self._search(query_vector, k, filters, with_text):
+                    if len(results) >= k:
+                        break
+                    if doc.metadata.get('_id') not in seen:
+                        results.append(doc)
+        
+        # Text is only fetched and decompressed for the final results
+        if self.parent_child:
+            return self._parents_for(results, num_results)
+        return self._with_text(results)
+    
+    def _search(self, query_vector: List[float], k: int, filters: Optional[Dict],
+                with_text: bool = False) -> List[Document]:
+        """
+        One similarity search. With page vectors it runs in two stages: the
+        page_candidates best pages (honouring filters), then the k best
+        chunks within those pages only. A Qdrant server does the second
+        stage as a search with an indexed `source` filter; embedded Qdrant
+        would scan every point for that filter, so there the candidate
+        pages' chunks are fetched by ID and ranked here instead.
+        
+        with_text also fetches the hits' text; otherwise only their metadata
+        is returned (see _with_text).
+        """
+        if not self.hierarchical:
+            return self._query(query_vector, k, self.build_filter(filters), with_text)
+        
+        pages = self.qdrant.query_points(
+            self.page_collection, query=query_vector, limit=self.page_candidates,
+            query_filter=self.build_filter(filters), with_payload=True
+        ).points
+        if not pages:
+            return []
+        if self.embedded_store:
+            return self._rank_page_chunks(query_vector, pages, k, filters)
+        sources = [page.payload['metadata']['source'] for page in pages]
+        return self._query(query_vector, k, self.build_filter({**(filters or {}), 'source': sources}), with_text)
+    
+    def _query(self, query_vector: List[float], k: int, query_filter: Optional["models.Filter"],
+               with_text: bool = False) -> List[Document]:
+        """k nearest chunks, with their text or (projected) with metadata only"""
+        points = self.qdrant.query_points(
+            self.collection_name, query=query_vector, limit=k,
+            query_filter=query_filter, with_payload=True if with_text else ['metadata']
+        ).points
+        return [self._to_document(point, self.collection_name) for point in points]
+    
+    @staticmethod
+    def _to_document(point, collection_name: str) -> Document:
+        """Document for a Qdrant point; page_content is empty unless its text was fetched"""
+        payload = point.payload or {}
+        return Document(
+            page_content=decode_text(payload),
+            metadata={**payload.get('metadata', {}), '_id': str(point.id), '_collection_name': collection_name}
+        )
+    
+    def _with_text(self, docs: List[Document]) -> List[Document]:
+        """Fill in the missing text of the final results with one retrieve() per collection"""
+        ids_by_collection = defaultdict(list)
+        for doc in docs:
+            if not doc.page_content:
+                ids_by_collection[doc.metadata['_collection_name']].append(doc.metadata['_id'])
+        texts = {}
+        for collection_name, ids in ids_by_collection.items():
+            for record in self.qdrant.retrieve(collection_name, ids=ids, with_vectors=False,
+                                               with_payload=['text', 'codec', 'page_content']):
+                texts[str(record.id)] = decode_text(record.payload)
+        for doc in docs:
+            if not doc.page_content:
+                doc.page_content = texts.get(doc.metadata['_id'], '')
+        return docs
+    
+    def _rank_page_chunks(self, query_vector: List[float], pages: List, k: int,
+                          filters: Optional[Dict]) -> List[Document]:
+        """Exact cosine ranking of the candidate pages' chunks, fetched by point ID"""
+        import numpy as np
+        
+        ids = [self._point_id(page.payload['metadata']['source'], position)
+               for page in pages for position in range(page.payload.get('chunks', 0))]
+        records = [
+            record for record in self.qdrant.retrieve(self.collection_name, ids=ids,
+                                                      with_payload=['metadata'], with_vectors=True)
+            if all(record.payload['metadata'].get(field) in
+                   (value if isinstance(value, (list, tuple, set)) else [value])
+                   for field, value in (filters or {}).items())
+        ]
+        if not records:
+            return []
+        
+        matrix = np.asarray([record.vector for record in records], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        return [self._to_document(records[i], self.collection_name) for i in np.argsort(-scores)[:k]]
+    
+    def _parents_for(self, children: List[Document], num_results: int) -> List[Document]:
+        """
+        Parent chunks of the matched children, each once, in the order of
+        their best-ranked child. Stops at num_results parents or when the
+        next one would exceed context_token_budget (the first is always kept).
+        """
+        parent_ids = list(dict.fromkeys(
+            child.metadata['parent_id'] for child in children if child.metadata.get('parent_id')
+        ))[:num_results]
+        if not parent_ids:
+            return self._with_text(children[:num_results])
+        
+        records = {str(record.id): record for record in self.qdrant.retrieve(
+            self.parent_collection, ids=parent_ids, with_payload=True, with_vectors=False
+        )}
+        parents, tokens = [], 0
+        for parent_id in parent_ids:
+            record = records.get(parent_id)
+            if record is None:
+                continue
+            parent = self._to_document(record, self.parent_collection)
+            tokens += count_tokens(parent.page_content)
+            if parents and tokens > self.context_token_budget:
+                break
+            parents.append(parent)
+        return parents
+    
+    def prefetch(self, partial_question: str, num_results: int = 4,
+                 filters: Optional[Dict] = None, history: Optional[List[Dict]] = None) -> bool:
+        """
+        Start retrieval for a question that has not been submitted yet.
+        query() reuses the result if the final question is the same or
+        the same followed by a few more words, so retrieval is off the
+        critical path. Pass the history query() will get: follow-ups that
+        query() rewrites before searching are not prefetched.
+        """
+        if not self.vector_store:
+            return False
+        if select_history(history, self.history_token_budget) and is_follow_up(partial_question):
+            return False
+        return self.prefetcher.prefetch(
+            partial_question, num_results, filters, self.is_code_request(partial_question)
+        )
+    
+    def build_messages(self, question: str, search_results: List[Document],
+                       is_code_request: bool = False,
+                       history: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Chat messages sent to the model for a question and its retrieved chunks.
+        history is an already-bounded list of earlier turns (see select_history).
+        """
+        # Format context from search results
+        context = self.format_search_results(search_results)
+        
+        # Static instructions first so the prefix is identical on every request,
+        # then earlier turns, then this turn's context and question
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *(history or []),
+            {"role": "user", "content": build_user_message(context, question, is_code_request)}
+        ]
+    
+    def query(self, question: str, num_results: int = 4, filters: Optional[Dict] = None,
+              history: Optional[List[Dict]] = None) -> str:
         """
         Query the documentation and get an AI-powered response.
         Returns a formatted answer with code examples and source citations.
+        
+        filters restricts retrieval by metadata, e.g. {'source': url} or
+        {'has_code': True}. Code questions prefer chunks with code examples.
+        history holds earlier {'role', 'content'} turns; the most recent ones
+        within history_token_budget are sent along, and follow-up questions
+        are rewritten into standalone queries before retrieval.
         """
         if not self.vector_store:
             raise ValueError("Vector store not initialized. Create or load one first.")
         
-        # Step 1: Search for relevant documents
+        history = select_history(history, self.history_token_budget)
+        search_question = self.rewriter.rewrite(question, history)
+        self.last_search_question = search_question
+        
+        # Determine if the question is asking for code
+        is_code_request = self.is_code_request(search_question)
+        
+        # Reject unknown filter fields up front rather than as a search error
+        self.build_filter(filters)
+        
+        # Step 1: Search for relevant documents, reusing a prefetched search if
+        # any (prefetches are of the raw text, so not for rewritten questions)
         try:
-            search_results = self.vector_store.similarity_search(
-                query=question,
-                k=num_results
-            )
+            search_results = None
+            if search_question == question:
+                search_results = self.prefetcher.take(
+                    search_question, num_results, filters, is_code_request
+                )
+            if search_results is None:
+                search_results = self.retrieve(
+                    search_question,
+                    num_results=num_results,
+                    filters=filters,
+                    prefer_code=is_code_request
+                )
         except Exception as e:
             return f"Error searching documentation: {str(e)}"
         
         if not search_results:
             return "I couldn't find relevant information in the documentation. Try rephrasing your question."
         
-        # Step 2: Format context from search results
-        context = self.format_search_results(search_results)
-        
-        # Step 3: Determine if the question is asking for code
-        is_code_request = any(keyword in question.lower() for keyword in [
-            'code', 'example', 'how to', 'implement', 'write', 'create',
-            'function', 'class', 'method', 'syntax', 'snippet'
-        ])
-        
-        # Step 4: Create system prompt
-        system_prompt = f"""You are DocChat AI, an expert documentation assistant. Your role is to provide accurate, helpful answers based on the provided documentation context.
-
-**Guidelines:**
-1. Answer ONLY based on the provided context. If the information isn't in the context, say so clearly.
-2. When providing code examples:
-   - Use proper syntax highlighting with ```language blocks
-   - Ensure code is complete and runnable
-   - Add helpful comments
-   - Show multiple approaches if relevant
-3. Always cite which source(s) your answer comes from
-4. Structure your answer clearly with:
-   - A direct answer to the question
-   - Supporting details/explanation
-   - Code examples (if relevant)
-   - Links to the documentation for further reading
-5. Be concise but thorough
-6. If the user is asking for code, prioritize showing working examples
-
-**Context from documentation:**
-{context}"""
-        
-        # Add code-specific instructions if needed
-        if is_code_request:
-            system_prompt += """
-
-**Note:** The user is asking for code/implementation details. Prioritize providing clear, working code examples with explanations."""
+        # Step 2: Build the prompt from search results
+        messages = self.build_messages(question, search_results, is_code_request, history)
         
-        # Step 5: Get response from OpenAI
+        # Step 3: Get response from the model chosen for this question
+        self.last_route = self.router.route(search_question, is_code_request)
+        self.last_prompt_stats = prompt_token_stats(messages)
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",  # Using GPT-4 for best quality
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": question}
-                ],
+            response = self.llm.generate(
+                messages,
+                model=self.last_route['model'],
                 temperature=0.1,  # Low temperature for factual accuracy
-                max_tokens=2000  # Enough for detailed responses with code
+                max_tokens=self.last_route['max_tokens']
             )
             
-            answer = response.choices[0].message.content
+            answer = response['content']
+            
+            # Provider-reported usage, including prefix-cache hits
+            self.last_prompt_stats['usage'] = response.get('usage', {})
             
-            # Step 6: Post-process the answer
+            # Step 4: Post-process the answer
             # Ensure code blocks are properly formatted
             answer = self._ensure_code_formatting(answer)
             
@@ -216,25 +964,7 @@ class DocumentationRAG:
     
     def _ensure_code_formatting(self, text: str) -> str:
         """Ensure code blocks are properly formatted for syntax highlighting"""
-        # Pattern to find code blocks without language specification
-        pattern = r'```\n(.*?)```'
-        
-        def add_language(match):
-            code = match.group(1)
-            # Try to detect language
-            if 'import ' in code or 'def ' in code or 'class ' in code:
-                return f'```python\n{code}```'
-            elif 'function ' in code or 'const ' in code or 'let ' in code:
-                return f'```javascript\n{code}```'
-            elif 'interface ' in code or 'type ' in code:
-                return f'```typescript\n{code}```'
-            elif '<' in code and '>' in code:
-                return f'```html\n{code}```'
-            else:
-                return f'```\n{code}```'
-        
-        text = re.sub(pattern, add_language, text, flags=re.DOTALL)
-        return text
+        return ensure_code_formatting(text)
     
     def get_statistics(self) -> Dict:
         """Get statistics about the indexed documentation"""
@@ -247,4 +977,10 @@ class DocumentationRAG:
             **self.doc_metadata
         }
         
+        entry = self.catalog.get(self.collection_name)
+        if entry:
+            stats["embedding_model"] = entry['embedding_model']
+            stats["embedding_dimensions"] = entry['embedding_dimensions']
+            stats["content_hash"] = entry['content_hash']
+        
         return stats
\ No newline at end of file
@@ -1,11 +1,23 @@
 import os
+import hashlib
+import logging
+import threading
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlsplit
 import time
-from typing import List, Set, Optional, Callable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, Set, Optional, Callable, Tuple
 import re
 from langchain.docstore.document import Document
+from backend.corpus import CorpusWriter
+from backend.fetcher import AdaptiveFetcher
+from backend.frontier import DiskFrontier, MemoryFrontier
+from backend.metrics import IngestionMetrics
+from backend.novelty import NoveltyTracker
+from backend.sitemap import CrawlPlan, build_crawl_plan, iter_sitemap_pages, parse_lastmod
+from backend.urlscope import URLScope, section_prefix
 
 class DocumentationScraper:
     """
@@ -14,17 +26,100 @@ class DocumentationScraper:
     footers, and other non-documentation elements.
     """
     
-    def __init__(self, base_url: str, max_pages: int = 50):
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    
+    # Crawls of at least this many pages use large-site mode by default
+    LARGE_SITE_PAGES = 1000
+    
+    # Responses worth parsing; a missing Content-Type is sniffed instead
+    HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+    # Pages larger than this are abandoned mid-download (bytes)
+    MAX_PAGE_BYTES = 5_000_000
+    # <meta charset=...> or http-equiv Content-Type near the top of the page
+    META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+    
+    def __init__(self, base_url: str, max_pages: int = 50, max_workers: int = 4,
+                 use_sitemap: bool = True, respect_robots: bool = True, sitemap_site_wide: bool = False,
+                 request_delay: float = 0.5,
+                 metrics: Optional[IngestionMetrics] = None,
+                 large_site: Optional[bool] = None, state_dir: Optional[str] = None,
+                 checkpoint: bool = False, resume: bool = False,
+                 fetcher: Optional[AdaptiveFetcher] = None,
+                 max_page_bytes: Optional[int] = None,
+                 include_patterns: Optional[List[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None,
+                 path_prefixes: Optional[List[str]] = None,
+                 adaptive_budget: bool = True, novelty: Optional[NoveltyTracker] = None):
         self.base_url = base_url
         self.max_pages = max_pages
+        self.max_workers = max(1, max_workers)
+        self.use_sitemap = use_sitemap
+        self.respect_robots = respect_robots
+        
+        # Which links are followed: same host, no login/download/etc. pages,
+        # plus optional path prefixes (e.g. ['/3/library/']) and
+        # include/exclude globs on the path (e.g. ['*/changelog*'])
+        self.scope = URLScope(base_url, include=include_patterns or (), exclude=exclude_patterns or (),
+                              path_prefixes=path_prefixes or ())
+        # Sitemaps list the whole host. Unless sitemap_site_wide is set, only
+        # entries in base_url's section (or under path_prefixes) seed the
+        # frontier; pages elsewhere on the host are still reached by links
+        self.sitemap_scope = self.scope
+        if not (sitemap_site_wide or path_prefixes):
+            self.sitemap_scope = URLScope(base_url, include=include_patterns or (),
+                                          exclude=exclude_patterns or (),
+                                          path_prefixes=(section_prefix(base_url),))
+        
+        # Large-site mode keeps the frontier and visited set in SQLite under
+        # state_dir (with a Bloom filter in front) instead of in RAM, and
+        # does not keep visited_urls; memory stays flat however many pages
+        # are crawled. Documents are streamed by iter_documentation().
+        self.large_site = max_pages >= self.LARGE_SITE_PAGES if large_site is None else large_site
+        self.state_dir = state_dir or os.getenv("DOCCHAT_CRAWL_STATE_DIR", "crawl_state")
+        
+        # Checkpointing also puts the frontier on disk, commits it before
+        # every yielded page and keeps it after the crawl (until
+        # clear_checkpoint()), so resume=True can continue an interrupted run
+        self.checkpoint = checkpoint or resume
+        self.resume = resume
+        self.frontier = MemoryFrontier()
         self.visited_urls: Set[str] = set()
+        self.pages_visited = 0
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            'User-Agent': self.USER_AGENT
         })
         
+        # Politeness delay each worker waits after a page (seconds)
+        self.request_delay = request_delay
+        self.max_page_bytes = max_page_bytes or self.MAX_PAGE_BYTES
+        
+        # Adaptive budget: skip near-duplicate pages, crawl low-value
+        # branches last and stop before max_pages once pages stop adding
+        # new content or links
+        self.novelty = novelty or (NoveltyTracker() if adaptive_budget else None)
+        self.stopped_early = False
+        # Set when the crawl stopped because the host stayed down through
+        # fetcher.max_trips circuit breaker trips; the crawl is not complete
+        self.host_unavailable = False
+        # Pages whose last fetch failed (as opposed to having no content)
+        self._failed_urls: Set[str] = set()
+        
+        self.crawl_plan: Optional[CrawlPlan] = None
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
         # Progress callback
         self.progress_callback: Optional[Callable] = None
+        
+        # Fetch/parse metrics and progress lines; shared with DocumentationRAG
+        # during ingestion, otherwise flushed at the end of each crawl
+        self._owns_metrics = metrics is None
+        self.metrics = metrics or IngestionMetrics()
+        
+        # Retries with backoff, per-host AIMD concurrency and a circuit breaker
+        self.fetcher = fetcher or AdaptiveFetcher(self.session, max_concurrency=self.max_workers,
+                                                  metrics=self.metrics)
     
     def set_progress_callback(self, callback: Callable):
         """Set callback for progress updates"""
@@ -34,27 +129,9 @@ class DocumentationScraper:
         """
         Filter to only include documentation URLs.
         Excludes login pages, downloads, community pages, etc.
+        (see backend/urlscope.py) and anything outside the configured scope.
         """
-        parsed = urlparse(url)
-        
-        # Patterns to exclude
-        exclude_patterns = [
-            '/search', '/login', '/register', '/download', '/community',
-            '/news', '/events', '/jobs', '/blog', '/forum', '/support',
-            '.pdf', '.zip', '.tar.gz', '.exe', '.dmg',
-            'javascript:', 'mailto:', '#',
-            '/privacy', '/terms', '/cookies', '/legal'
-        ]
-        
-        # Check if URL contains excluded patterns
-        url_lower = url.lower()
-        for pattern in exclude_patterns:
-            if pattern in url_lower:
-                return False
-        
-        # Include only URLs from the same domain
-        base_domain = urlparse(self.base_url).netloc
-        return parsed.netloc == base_domain
+        return self.scope.matches(url)
     
     def extract_main_content(self, soup: BeautifulSoup, url: str) -> str:
         """
@@ -179,55 +256,158 @@ class DocumentationScraper:
         
         return code_examples
     
-    def scrape_page(self, url: str) -> Optional[Document]:
-        """Scrape a single page and return a Document"""
+    def _throttle(self):
+        """Enforce the robots.txt Crawl-delay across all workers"""
+        delay = self.crawl_plan.crawl_delay if self.crawl_plan else None
+        if not delay:
+            return
+        
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait_for = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + delay
+        
+        if wait_for > 0:
+            time.sleep(wait_for)
+    
+    def build_document(self, soup: BeautifulSoup, url: str) -> Optional[Document]:
+        """Build a Document from a parsed page, or None if it has no real content"""
+        # Extract title
+        title_element = soup.find('title')
+        title = title_element.get_text(strip=True) if title_element else "No Title"
+        
+        # Clean up title
+        title = re.sub(r'\s*[\|·\-–—]\s*.*$', '', title)  # Remove site name
+        title = title.strip()
+        
+        # Extract main content
+        content = self.extract_main_content(soup, url)
+        
+        # Skip pages with very little content
+        if len(content) < 100:
+            return None
+        
+        # Extract code examples
+        code_examples = self.extract_code_examples(soup)
+        
+        # Create metadata
+        metadata = {
+            'source': url,
+            'title': title,
+            'length': len(content),
+            'has_code': len(code_examples) > 0,
+            'code_count': len(code_examples)
+        }
+        
+        # Add code examples to content if found
+        if code_examples:
+            content += "\n\nCode Examples:\n" + "\n---\n".join(code_examples[:3])
+        
+        return Document(page_content=content, metadata=metadata)
+    
+    def fetch_page(self, url: str) -> Tuple[Optional[Document], List[str]]:
+        """
+        Fetch a page once and return its Document plus the documentation
+        links found on it. Either part may be empty on failure.
+        """
         try:
-            # Make request with timeout
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title_element = soup.find('title')
-            title = title_element.get_text(strip=True) if title_element else "No Title"
-            
-            # Clean up title
-            title = re.sub(r'\s*[\|·\-–—]\s*.*$', '', title)  # Remove site name
-            title = title.strip()
-            
-            # Extract main content
-            content = self.extract_main_content(soup, url)
-            
-            # Skip pages with very little content
-            if len(content) < 100:
-                return None
+            self._throttle()
             
-            # Extract code examples
-            code_examples = self.extract_code_examples(soup)
-            
-            # Create metadata
-            metadata = {
-                'source': url,
-                'title': title,
-                'length': len(content),
-                'has_code': len(code_examples) > 0,
-                'code_count': len(code_examples)
-            }
-            
-            # Add code examples to content if found
-            if code_examples:
-                content += "\n\nCode Examples:\n" + "\n---\n".join(code_examples[:3])
+            # Make request (retried on timeouts, 429 and 5xx), streaming the
+            # body so non-HTML and oversized responses are dropped early
+            with self.metrics.timer('fetch_seconds'):
+                response = self.fetcher.get(url, stream=True)
+                try:
+                    response.raise_for_status()
+                    content = self._read_body(response, url)
+                finally:
+                    response.close()
+            if content is None:
+                return None, []
             
-            return Document(page_content=content, metadata=metadata)
+            # Parse HTML and extract content and links
+            with self.metrics.timer('parse_seconds'):
+                soup = BeautifulSoup(self._decode(content, response), 'html.parser')
+                
+                doc = self.build_document(soup, url)
+                if not doc:
+                    return None, []
+                
+                # Hash of the raw HTML, used to detect unchanged pages between crawls
+                doc.metadata['html_hash'] = hashlib.sha256(content).hexdigest()
+                return doc, self.find_documentation_links(soup, url)
             
         except requests.exceptions.RequestException as e:
-            print(f"Error scraping {url}: {str(e)}")
-            return None
+            self._failed_urls.add(url)
+            self.metrics.increment('fetch_errors')
+            self.metrics.event(f"Error scraping {url}: {str(e)}", logging.WARNING, url=url)
+            return None, []
         except Exception as e:
-            print(f"Unexpected error scraping {url}: {str(e)}")
+            self._failed_urls.add(url)
+            self.metrics.increment('fetch_errors')
+            self.metrics.event(f"Unexpected error scraping {url}: {str(e)}", logging.WARNING, url=url)
+            return None, []
+    
+    def _reject(self, url: str, reason: str, detail: str):
+        self.metrics.increment(f'pages_rejected_{reason}')
+        self.metrics.event(f"  ⊘ Skipped {url}: {detail}", url=url, reason=reason)
+    
+    def _read_body(self, response: requests.Response, url: str) -> Optional[bytes]:
+        """
+        Read a streamed response if it looks like an HTML page of sane
+        size: Content-Type and Content-Length are checked before the body
+        is touched, and the download stops once max_page_bytes is passed.
+        Returns None (and counts the rejection) otherwise.
+        """
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in self.HTML_CONTENT_TYPES:
+            self._reject(url, 'content_type', content_type)
+            return None
+        
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > self.max_page_bytes:
+            self._reject(url, 'too_large', f"Content-Length {int(content_length):,} bytes")
             return None
+        
+        body = bytearray()
+        for block in response.iter_content(chunk_size=64 * 1024):
+            body += block
+            if len(body) > self.max_page_bytes:
+                self.metrics.increment('bytes_downloaded', len(body))
+                self._reject(url, 'too_large', f"over {self.max_page_bytes:,} bytes")
+                return None
+        self.metrics.increment('bytes_downloaded', len(body))
+        
+        if not content_type and body.lstrip()[:1] != b'<':
+            self._reject(url, 'content_type', "no Content-Type and not markup")
+            return None
+        return bytes(body)
+    
+    def _decode(self, content: bytes, response: requests.Response):
+        """
+        Decode with the charset from the headers or a <meta> tag, else
+        UTF-8. Only if none of those work is BeautifulSoup left to guess
+        from the raw bytes, which is much slower on large pages.
+        """
+        candidates = []
+        if 'charset=' in response.headers.get('Content-Type', '').lower():
+            candidates.append(response.encoding)
+        match = self.META_CHARSET.search(content, 0, 4096)
+        if match:
+            candidates.append(match.group(1).decode('ascii', 'ignore'))
+        candidates.append('utf-8')
+        
+        for encoding in candidates:
+            try:
+                return content.decode(encoding)
+            except (LookupError, UnicodeDecodeError):
+                continue
+        return content
+    
+    def scrape_page(self, url: str) -> Optional[Document]:
+        """Scrape a single page and return a Document"""
+        doc, _ = self.fetch_page(url)
+        return doc
     
     def find_documentation_links(self, soup: BeautifulSoup, current_url: str) -> List[str]:
         """Find links to other documentation pages"""
@@ -239,6 +419,7 @@ class DocumentationScraper:
         if not content_areas:
             content_areas = [soup]
         
+        scope = self.scope
         for area in content_areas:
             for link in area.find_all('a', href=True):
                 href = link['href']
@@ -251,80 +432,305 @@ class DocumentationScraper:
                 full_url = urljoin(current_url, href)
                 
                 # Normalize URL (remove fragments and query parameters for docs)
-                parsed = urlparse(full_url)
+                parsed = urlsplit(full_url)
                 normalized_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
                 
                 # Check if it's a valid documentation URL
-                if (self.is_documentation_url(normalized_url) and 
-                    normalized_url not in self.visited_urls and
-                    normalized_url not in found_urls and
-                    len(self.visited_urls) < self.max_pages):
+                if (normalized_url not in found_urls and
+                    scope.matches(normalized_url) and
+                    not self.frontier.seen(normalized_url) and
+                    self.pages_visited < self.max_pages):
                     
                     found_urls.add(normalized_url)
                     links.append(normalized_url)
         
         return links
     
-    def scrape_documentation(self) -> List[Document]:
+    def plan_crawl(self) -> CrawlPlan:
+        """
+        Read robots.txt and find the sitemaps before crawling, so the
+        frontier can be seeded with every known page up front.
+        """
+        self.crawl_plan = build_crawl_plan(
+            self.session, self.base_url, self.USER_AGENT,
+            use_sitemap=self.use_sitemap
+        )
+        
+        if not self.respect_robots:
+            self.crawl_plan.robots.allow_all = True
+        
+        return self.crawl_plan
+    
+    def iter_sitemap_seeds(self) -> Iterator[Tuple[str, str]]:
+        """(url, lastmod) for each sitemap entry inside the crawl's section"""
+        if not self.crawl_plan:
+            self.plan_crawl()
+        for url, lastmod in iter_sitemap_pages(self.session, self.crawl_plan.sitemaps):
+            if self.sitemap_scope.matches(url):
+                yield url, lastmod
+    
+    def scrape_documentation(self, corpus_writer: Optional[CorpusWriter] = None) -> List[Document]:
         """
         Scrape multiple pages from documentation site.
         Returns a list of Document objects containing the scraped content.
+        
+        For large sites use iter_documentation() instead, so pages are
+        streamed rather than collected in memory.
+        """
+        return list(self.iter_documentation(corpus_writer))
+    
+    @property
+    def state_path(self) -> str:
+        """Where the disk frontier (and crawl checkpoint) for base_url lives"""
+        state_name = hashlib.sha256(self.base_url.encode()).hexdigest()[:16]
+        return os.path.join(self.state_dir, f"{state_name}.frontier.db")
+    
+    def clear_checkpoint(self):
+        """Delete the crawl checkpoint once its pages are safely stored"""
+        if isinstance(self.frontier, DiskFrontier):
+            self.frontier.destroy()
+            self.frontier = MemoryFrontier()
+        else:
+            DiskFrontier(self.state_path).destroy()
+    
+    def iter_documentation(self, corpus_writer: Optional[CorpusWriter] = None,
+                           is_done: Optional[Callable[[str], bool]] = None) -> Iterator[Document]:
         """
-        documents = []
-        urls_to_visit = [self.base_url]
+        Crawl the documentation site, yielding each Document as soon as it
+        is extracted.
         
-        print(f"Starting documentation scrape from: {self.base_url}")
-        print(f"Max pages to crawl: {self.max_pages}")
+        The frontier is seeded from the sitemap (most recently modified
+        pages first) and extended by link-following; pages are fetched by
+        a pool of max_workers threads. If corpus_writer is given, every
+        page is also streamed to the snapshot.
         
-        while urls_to_visit and len(self.visited_urls) < self.max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            # Skip if already visited
-            if current_url in self.visited_urls:
-                continue
-            
-            print(f"[{len(self.visited_urls) + 1}/{self.max_pages}] Scraping: {current_url}")
-            
-            # Update progress
-            if self.progress_callback:
-                self.progress_callback(
-                    len(self.visited_urls) + 1,
-                    self.max_pages,
-                    f"Scraping: {urlparse(current_url).path}"
-                )
-            
-            self.visited_urls.add(current_url)
-            
-            # Scrape the current page
-            doc = self.scrape_page(current_url)
-            if doc:
-                documents.append(doc)
-                print(f"  ✓ Extracted {doc.metadata['length']} characters")
+        When resuming, pages fetched before the interruption are fetched
+        again unless is_done(url) reports they were already stored.
+        """
+        metrics = self.metrics
+        crawl_started = time.perf_counter()
+        documents_extracted = 0
+        total_characters = 0
+        
+        metrics.event(f"Starting documentation scrape from: {self.base_url}", base_url=self.base_url)
+        metrics.event(f"Max pages to crawl: {self.max_pages}")
+        if self.large_site or self.checkpoint:
+            self.frontier = DiskFrontier(
+                self.state_path,
+                expected_urls=max(100_000, self.max_pages * 20),
+                fresh=not self.resume
+            )
+            if self.large_site:
+                metrics.event(f"  - Large-site mode: frontier at {self.frontier.path}")
+            if self.resume:
+                self.pages_visited, requeued = self.frontier.requeue(is_done)
+                metrics.event(f"  - Resuming: {self.pages_visited} pages already done, "
+                              f"{len(self.frontier)} queued ({requeued} to refetch)")
+        
+        plan = self.plan_crawl()
+        if plan.crawl_delay:
+            metrics.event(f"  - robots.txt Crawl-delay: {plan.crawl_delay}s")
+        
+        frontier = self.frontier
+        
+        def enqueue(url: str, depth: int, lastmod: str = '') -> bool:
+            if frontier.seen(url):
+                return False
+            if not plan.can_fetch(url):
+                return False
+            # Within a depth, most recently modified pages first
+            return frontier.push(url, depth, -parse_lastmod(lastmod))
+        
+        # Sitemap entries go straight into the frontier (on disk in
+        # large-site mode) as they are parsed; lastmod only sets their order
+        seeded = 0
+        for url, lastmod in self.iter_sitemap_seeds():
+            seeded += enqueue(url, 0 if url == self.base_url else 1, lastmod)
+        enqueue(self.base_url, 0)
+        
+        if seeded:
+            metrics.event(f"  - Seeded {seeded} URLs from sitemap")
+        
+        completed = False
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                in_flight = {}
+                # Popped while their host was at its concurrency limit or its
+                # circuit breaker was open
+                deferred = deque()
                 
-                # Find more links to scrape
-                try:
-                    response = self.session.get(current_url, timeout=10)
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    new_links = self.find_documentation_links(soup, current_url)
-                    
-                    # Add new links to visit
-                    for link in new_links:
-                        if link not in urls_to_visit and link not in self.visited_urls:
-                            urls_to_visit.append(link)
+                while len(frontier) or deferred or in_flight:
+                    # Keep every worker busy while there is budget left
+                    while len(in_flight) < self.max_workers and not self._out_of_budget():
+                        if deferred:
+                            depth, current_url = deferred.popleft()
+                        elif len(frontier):
+                            depth, current_url = frontier.pop()
+                        else:
+                            break
+                        
+                        if not self.fetcher.try_acquire(current_url):
+                            deferred.appendleft((depth, current_url))
+                            break
+                        
+                        metrics.event(f"[{self.pages_visited + 1}/{self.max_pages}] Scraping: {current_url}", url=current_url)
+                        
+                        # Update progress
+                        if self.progress_callback:
+                            self.progress_callback(
+                                self.pages_visited + 1,
+                                self.max_pages,
+                                f"Scraping: {urlparse(current_url).path}"
+                            )
+                        
+                        self.pages_visited += 1
+                        if not self.large_site:
+                            self.visited_urls.add(current_url)
+                        metrics.increment('pages_fetched')
+                        in_flight[executor.submit(self._fetch_politely, current_url)] = (current_url, depth)
                     
-                    print(f"  → Found {len(new_links)} new documentation links")
+                    if not in_flight:
+                        if not deferred or self._out_of_budget():
+                            break
+                        # Nothing running: the host's circuit breaker is open
+                        waiting_url = deferred[0][1]
+                        if self.fetcher.is_down(waiting_url):
+                            self.host_unavailable = True
+                            metrics.event(
+                                f"  ⏸ {urlparse(waiting_url).netloc} is still failing after "
+                                f"{self.fetcher.max_trips} circuit breaker trips: stopping with "
+                                f"{len(frontier) + len(deferred)} pages left for a resumed crawl",
+                                logging.WARNING, host=urlparse(waiting_url).netloc
+                            )
+                            break
+                        cooldown = max(self.fetcher.reopens_in(waiting_url), 0.05)
+                        metrics.increment('circuit_wait_seconds', cooldown)
+                        time.sleep(cooldown)
+                        continue
                     
-                except Exception as e:
-                    print(f"  ✗ Error finding links: {str(e)}")
-            else:
-                print(f"  ✗ No content extracted")
-            
-            # Be polite - don't hammer the server
-            time.sleep(0.5)
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        current_url, depth = in_flight.pop(future)
+                        doc, new_links = future.result()
+                        
+                        if current_url in self._failed_urls:
+                            self._failed_urls.discard(current_url)
+                            if self.fetcher.is_open(current_url):
+                                # Failed as its host went down: fetch it again once
+                                # the breaker lets requests through
+                                deferred.append((depth, current_url))
+                                self.pages_visited -= 1
+                            else:
+                                # Not marked finished, so a resumed crawl fetches it again
+                                metrics.increment('pages_failed')
+                            continue
+                        
+                        if doc:
+                            novelty = 1.0
+                            child_depth = depth + 1
+                            if self.novelty:
+                                novelty = self.novelty.observe(doc.page_content, len(new_links))
+                                if self.novelty.is_low(novelty, len(new_links)):
+                                    # Little new content or links here: explore this branch last
+                                    child_depth += self.novelty.depth_penalty
+                                    metrics.increment('branches_deprioritized')
+                            
+                            # Add new links to visit
+                            for link in new_links:
+                                enqueue(link, child_depth)
+                            
+                            metrics.increment('links_found', len(new_links))
+                            metrics.event(f"  → Found {len(new_links)} new documentation links")
+                            
+                            if self.novelty and self.novelty.is_duplicate(novelty):
+                                frontier.mark_finished(current_url)
+                                metrics.increment('pages_near_duplicate')
+                                metrics.event(f"  ≈ Skipped near-duplicate ({novelty:.0%} new content): {current_url}",
+                                              url=current_url, novelty=novelty)
+                                continue
+                            
+                            if corpus_writer:
+                                corpus_writer.write(doc)
+                            documents_extracted += 1
+                            total_characters += doc.metadata['length']
+                            metrics.increment('documents_extracted')
+                            metrics.increment('characters_extracted', doc.metadata['length'])
+                            metrics.event(f"  ✓ Extracted {doc.metadata['length']} characters from {current_url}",
+                                          url=current_url, characters=doc.metadata['length'])
+                            if self.checkpoint:
+                                # The page's links are durable before anyone stores the page
+                                frontier.commit()
+                            yield doc
+                        else:
+                            frontier.mark_finished(current_url)
+                            metrics.increment('pages_empty')
+                            metrics.event(f"  ✗ No content extracted from {current_url}", url=current_url)
+            # A crawl stopped by a host that stays down keeps its checkpoint
+            completed = not self.host_unavailable
+        finally:
+            if isinstance(frontier, DiskFrontier):
+                if not completed:
+                    # Interrupted: leave the checkpoint for resume=True
+                    frontier.close()
+                    self.frontier = MemoryFrontier()
+                elif self.checkpoint:
+                    frontier.commit()
+                else:
+                    frontier.destroy()
+                    self.frontier = MemoryFrontier()
         
-        print(f"\n✅ Scraping complete!")
-        print(f"  - Pages visited: {len(self.visited_urls)}")
-        print(f"  - Documents extracted: {len(documents)}")
-        print(f"  - Total content: {sum(doc.metadata['length'] for doc in documents):,} characters")
+        metrics.observe('crawl_seconds', time.perf_counter() - crawl_started)
+        metrics.event(f"\n✅ Scraping complete!")
+        metrics.event(f"  - Pages visited: {self.pages_visited}")
+        metrics.event(f"  - Documents extracted: {documents_extracted}")
+        metrics.event(f"  - Total content: {total_characters:,} characters")
+        if metrics.counters.get('fetch_retries'):
+            metrics.event(f"  - Retried requests: {metrics.counters['fetch_retries']:g}")
+        rejected = {reason: metrics.counters.get(f'pages_rejected_{reason}', 0)
+                    for reason in ('content_type', 'too_large')}
+        if any(rejected.values()):
+            metrics.event(f"  - Rejected before parsing: {rejected['content_type']:g} non-HTML, "
+                          f"{rejected['too_large']:g} over {self.max_page_bytes:,} bytes")
+        if metrics.counters.get('pages_near_duplicate'):
+            metrics.event(f"  - Near-duplicates skipped: {metrics.counters['pages_near_duplicate']:g}")
+        if self.stopped_early:
+            metrics.event(f"  - Stopped early: {len(frontier)} queued pages were left uncrawled")
+        if metrics.counters.get('pages_failed'):
+            metrics.event(f"  - Failed to fetch: {metrics.counters['pages_failed']:g}")
+        if metrics.counters.get('circuit_wait_seconds'):
+            metrics.event(f"  - Waited for open circuit breakers: {metrics.counters['circuit_wait_seconds']:.1f}s")
+        if self.host_unavailable:
+            metrics.event("  - Incomplete: the host stayed unavailable; resume the crawl to fetch the rest")
         
-        return documents
\ No newline at end of file
+        if self._owns_metrics:
+            metrics.flush()
+    
+    def _out_of_budget(self) -> bool:
+        """max_pages reached, or the adaptive budget says further pages add too little"""
+        if self.pages_visited >= self.max_pages:
+            return True
+        if not (self.novelty and self.novelty.exhausted):
+            return False
+        if not self.stopped_early:
+            self.stopped_early = True
+            self.metrics.increment('crawl_stopped_early')
+            self.metrics.event(
+                f"  ⏹ Stopping early: the last {self.novelty.window} pages averaged "
+                f"{self.novelty.recent_novelty:.0%} new content and "
+                f"{self.novelty.recent_link_yield:.1f} new links",
+                novelty=self.novelty.recent_novelty, link_yield=self.novelty.recent_link_yield
+            )
+        return True
+    
+    def _fetch_politely(self, url: str) -> Tuple[Optional[Document], List[str]]:
+        """
+        Worker entry point: fetch a page, then pause so we don't hammer the
+        server. The host slot reserved by the scheduler is released after.
+        """
+        try:
+            result = self.fetch_page(url)
+            if not (self.crawl_plan and self.crawl_plan.crawl_delay):
+                time.sleep(self.request_delay)
+            return result
+        finally:
+            self.fetcher.release(url)
@@ -0,0 +1,178 @@
+import gzip
+import io
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from backend.metrics import get_logger
+
+
+class CrawlPlan:
+    """
+    Up-front crawl plan for a documentation site.
+    Combines robots.txt rules with the site's sitemaps, whose entries
+    (iter_sitemap_pages) let the scraper seed its whole frontier before
+    the first page is fetched.
+    """
+
+    def __init__(self, robots: robotparser.RobotFileParser, user_agent: str):
+        self.robots = robots
+        self.user_agent = user_agent
+        # Sitemap (or sitemap index) URLs to read the page list from
+        self.sitemaps: List[str] = []
+
+    @property
+    def crawl_delay(self) -> Optional[float]:
+        """Crawl-delay requested by robots.txt, if any"""
+        delay = self.robots.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def can_fetch(self, url: str) -> bool:
+        """Check robots.txt disallow rules for a URL"""
+        return self.robots.can_fetch(self.user_agent, url)
+
+
+def parse_lastmod(value: str) -> float:
+    """
+    Convert a sitemap <lastmod> value to a UNIX timestamp.
+    Accepts both the date-only and full W3C datetime forms; returns 0.0
+    for missing or malformed values so they sort as "oldest".
+    """
+    if not value:
+        return 0.0
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def load_robots(session: requests.Session, base_url: str, user_agent: str,
+                timeout: int = 10) -> robotparser.RobotFileParser:
+    """
+    Fetch and parse robots.txt for the host of base_url.
+    A missing robots.txt allows everything; 401/403 disallows everything,
+    matching the behaviour of urllib.robotparser.
+    """
+    parsed = urlparse(base_url)
+    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    robots = robotparser.RobotFileParser(robots_url)
+    try:
+        response = session.get(robots_url, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        get_logger().warning(f"  ✗ Could not fetch robots.txt: {str(e)}")
+        robots.allow_all = True
+        return robots
+
+    if response.status_code in (401, 403):
+        robots.disallow_all = True
+    elif response.status_code >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(response.text.splitlines())
+
+    return robots
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from an element tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _read_sitemap(session: requests.Session, url: str, timeout: int) -> Optional[bytes]:
+    """Download a sitemap, transparently decompressing gzip payloads"""
+    try:
+        response = session.get(url, timeout=timeout)
+        if response.status_code >= 400:
+            return None
+        body = response.content
+    except requests.exceptions.RequestException as e:
+        get_logger().warning(f"  ✗ Could not fetch sitemap {url}: {str(e)}")
+        return None
+
+    # .xml.gz files are usually served as application/gzip without
+    # Content-Encoding, so requests hands us the compressed bytes
+    if body[:2] == b'\x1f\x8b':
+        try:
+            body = gzip.decompress(body)
+        except OSError:
+            return None
+    return body
+
+
+def iter_sitemap_pages(session: requests.Session, sitemap_urls: List[str],
+                       timeout: int = 10, max_sitemaps: int = 50) -> Iterator[Tuple[str, str]]:
+    """
+    Walk sitemaps and sitemap indexes, yielding (page_url, lastmod) with
+    lastmod as published ('' if missing). Nested indexes are followed
+    breadth-first up to max_sitemaps files. Entries are parsed and yielded
+    one at a time, so only the current sitemap file is held in memory.
+    """
+    pending = list(sitemap_urls)
+    seen = set()
+
+    while pending and len(seen) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+
+        body = _read_sitemap(session, sitemap_url, timeout)
+        if not body:
+            continue
+
+        root, is_index, depth = None, False, 0
+        try:
+            for event, element in ET.iterparse(io.BytesIO(body), events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root, is_index = element, _local_name(element.tag) == 'sitemapindex'
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                # A complete <url>/<sitemap> entry
+                loc, lastmod = None, ''
+                for child in element:
+                    name = _local_name(child.tag)
+                    if name == 'loc' and child.text:
+                        loc = urljoin(sitemap_url, child.text.strip())
+                    elif name == 'lastmod' and child.text:
+                        lastmod = child.text.strip()
+                root.clear()
+                if not loc:
+                    continue
+                if is_index:
+                    pending.append(loc)
+                else:
+                    yield loc, lastmod
+        except ET.ParseError:
+            continue
+
+
+def build_crawl_plan(session: requests.Session, base_url: str, user_agent: str,
+                     use_sitemap: bool = True, timeout: int = 10) -> CrawlPlan:
+    """
+    Read robots.txt for base_url and (optionally) note its advertised
+    sitemaps, falling back to /sitemap.xml when robots.txt lists no
+    Sitemap lines. The sitemaps themselves are read by iter_sitemap_pages.
+    """
+    robots = load_robots(session, base_url, user_agent, timeout)
+    plan = CrawlPlan(robots, user_agent)
+
+    if use_sitemap:
+        parsed = urlparse(base_url)
+        plan.sitemaps = robots.site_maps() or [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+
+    return plan
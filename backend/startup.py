@@ -0,0 +1,61 @@
+import importlib
+import threading
+import time
+from typing import Iterable, Optional
+
+from backend.metrics import get_logger
+
+# Dependencies the backend imports lazily, roughly heaviest first. Together
+# they account for most of a cold start (see benchmarks/import_time.py).
+HEAVY_MODULES = (
+    "langchain_qdrant",
+    "qdrant_client",
+    "langchain_openai",
+    "openai",
+    "langchain.text_splitter",
+    "requests",
+    "bs4",
+    "backend.rag",
+)
+
+_prewarm_thread: Optional[threading.Thread] = None
+_prewarm_lock = threading.Lock()
+
+
+def _prewarm(modules: Iterable[str], warm_embeddings: bool):
+    start = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            # Optional dependency; whoever needs it reports the error
+            pass
+
+    if warm_embeddings:
+        try:
+            from backend.embeddings import get_embedding_backend, warm_up_in_background
+            thread = warm_up_in_background(get_embedding_backend())
+            if thread:
+                thread.join()
+        except Exception as e:
+            get_logger().warning(f"⚠️ Embedding warm-up failed: {str(e)}")
+
+    get_logger().info(f"🔥 Backend pre-warmed in {time.perf_counter() - start:.2f}s")
+
+
+def prewarm_in_background(modules: Iterable[str] = HEAVY_MODULES,
+                          warm_embeddings: bool = True) -> threading.Thread:
+    """
+    Import heavy dependencies and warm the embedding backend on a daemon
+    thread, once per process. The UI renders immediately; the first query
+    finds everything already loaded (or waits only for what is left).
+    """
+    global _prewarm_thread
+    with _prewarm_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = threading.Thread(
+                target=_prewarm, args=(tuple(modules), warm_embeddings),
+                name="backend-prewarm", daemon=True
+            )
+            _prewarm_thread.start()
+        return _prewarm_thread
@@ -0,0 +1,102 @@
+import re
+from collections import defaultdict
+from fnmatch import translate
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+# URL fragments that mark non-documentation pages (matched case-insensitively
+# anywhere in the URL): site chrome, community pages, downloads, non-HTTP links
+DEFAULT_EXCLUDES = (
+    '/search', '/login', '/register', '/download', '/community',
+    '/news', '/events', '/jobs', '/blog', '/forum', '/support',
+    '.pdf', '.zip', '.tar.gz', '.exe', '.dmg',
+    'javascript:', 'mailto:', '#',
+    '/privacy', '/terms', '/cookies', '/legal'
+)
+
+
+def _compile_fragments(fragments: Iterable[str]) -> Optional["re.Pattern"]:
+    """
+    One regex finding any of the (lowercase) fragments. Alternatives are
+    grouped by first character ("/(?:search|login|...)|\\.(?:pdf|zip)|..."),
+    so the scan only stops at characters that can start a fragment; that
+    is several times faster than a flat alternation or an `in` loop.
+    """
+    by_first = defaultdict(list)
+    for fragment in fragments:
+        if fragment:
+            by_first[fragment[0].lower()].append(re.escape(fragment[1:].lower()))
+    if not by_first:
+        return None
+    alternatives = []
+    for first, rests in by_first.items():
+        rests = [rest for rest in rests if rest]
+        if len(rests) < len(by_first[first]):
+            # The bare first character is itself a fragment
+            alternatives.append(re.escape(first))
+        elif rests:
+            alternatives.append(f"{re.escape(first)}(?:{'|'.join(rests)})")
+    return re.compile("|".join(alternatives))
+
+
+def _compile_globs(globs: Iterable[str]) -> Optional["re.Pattern"]:
+    """One regex matching a URL path against any of the glob patterns"""
+    globs = list(globs)
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{translate(glob)})" for glob in globs))
+
+
+def section_prefix(url: str) -> str:
+    """
+    Path prefix of the documentation section a URL belongs to, ending in
+    "/": its directory for a file-like last segment ("/docs/intro.html" ->
+    "/docs/"), else the path itself ("/learn" -> "/learn/").
+    """
+    path = urlsplit(url).path or '/'
+    last = path.rsplit('/', 1)[-1]
+    if '.' in last:
+        return path[:len(path) - len(last)]
+    return path if path.endswith('/') else path + '/'
+
+
+class URLScope:
+    """
+    Decides which links belong to a crawl, compiled once per scraper.
+
+    A URL is in scope when it is on the base URL's host, contains none of
+    the exclude fragments (case-insensitive), its path starts with one of
+    path_prefixes (if any), matches one of the include globs (if any) and
+    none of the exclude globs. Globs use fnmatch syntax against the URL
+    path, e.g. "/3/library/*" or "*/changelog*".
+
+    The host check and path extraction are one anchored regex match, and
+    the fragments one more search, instead of urlparse() calls and a loop
+    per link.
+    """
+
+    def __init__(self, base_url: str, include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 path_prefixes: Iterable[str] = (), exclude_fragments: Iterable[str] = DEFAULT_EXCLUDES):
+        self.netloc = urlsplit(base_url).netloc
+        self.path_prefixes = tuple(path_prefixes)
+        # scheme://<base host><path>, followed by a query, fragment or the end
+        self._origin = re.compile(
+            rf"[A-Za-z][A-Za-z0-9+.-]*://{re.escape(self.netloc)}(?P<path>(?:/[^?#]*)?)(?=[?#]|$)"
+        )
+        self._fragments = _compile_fragments(exclude_fragments)
+        self._include = _compile_globs(include)
+        self._exclude = _compile_globs(exclude)
+
+    def matches(self, url: str) -> bool:
+        origin = self._origin.match(url)
+        if not origin:
+            return False
+        if self._fragments and self._fragments.search(url.lower()):
+            return False
+
+        path = origin.group('path')
+        if self.path_prefixes and not path.startswith(self.path_prefixes):
+            return False
+        if self._include and not self._include.match(path):
+            return False
+        return not (self._exclude and self._exclude.match(path))
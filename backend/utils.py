@@ -0,0 +1,37 @@
+import threading
+from typing import Dict, List
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_encoder_loaded = False
+
+
+def _get_encoder():
+    """tiktoken encoder for GPT-4 models, or None when unavailable (e.g. offline)"""
+    global _encoder, _encoder_loaded
+    with _encoder_lock:
+        if not _encoder_loaded:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoder = None
+            _encoder_loaded = True
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens the way the chat model will.
+    Falls back to the ~4 characters per token rule of thumb when the
+    tiktoken vocabulary cannot be loaded.
+    """
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Approximate prompt tokens for a chat request (content + per-message overhead)"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 3
@@ -0,0 +1,85 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from backend.metrics import get_logger
+
+# qdrant_client takes about a second to import; load it with the first client
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+# Supported VECTOR_STORE_BACKEND values:
+#   server - networked Qdrant at QDRANT_URL (docker-compose / Qdrant Cloud)
+#   local  - in-process Qdrant persisted to QDRANT_PATH, no separate container
+#   memory - in-process, non-persistent (tests and benchmarks)
+BACKENDS = ("server", "local", "memory")
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+_clients: Dict[str, "QdrantClient"] = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend() -> str:
+    """Configured vector store backend"""
+    backend = os.getenv("VECTOR_STORE_BACKEND", "server").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{backend}'. Use one of: {', '.join(BACKENDS)}")
+    return backend
+
+
+def _create_client(backend: str, prefer_grpc: Optional[bool] = None) -> "QdrantClient":
+    """
+    New client for a backend. The server client talks REST on QDRANT_URL,
+    or gRPC on QDRANT_GRPC_PORT (default 6334) when QDRANT_PREFER_GRPC is
+    set (or prefer_grpc=True), which is cheaper per request and for bulk
+    uploads.
+    """
+    from qdrant_client import QdrantClient
+
+    if backend == "local":
+        path = os.getenv("QDRANT_PATH", "./qdrant_local")
+        get_logger().info(f"📁 Using embedded Qdrant storage at: {path}")
+        return QdrantClient(path=path)
+    if backend == "memory":
+        return QdrantClient(location=":memory:")
+    if prefer_grpc is None:
+        prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in TRUE_VALUES
+    return QdrantClient(
+        url=os.getenv("QDRANT_URL", "http://localhost:6333"),
+        api_key=os.getenv("QDRANT_API_KEY", None),
+        prefer_grpc=prefer_grpc,
+        grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    )
+
+
+def get_qdrant_client(backend: Optional[str] = None) -> "QdrantClient":
+    """
+    Return the process-wide Qdrant client for a backend.
+
+    Embedded (local) storage can only be opened by one client per process,
+    so every DocumentationRAG instance shares the same client.
+    """
+    backend = backend or get_backend()
+    with _clients_lock:
+        if backend not in _clients:
+            _clients[backend] = _create_client(backend)
+        return _clients[backend]
+
+
+def is_embedded(client: "QdrantClient") -> bool:
+    """
+    True for in-process (local or memory) clients. These evaluate payload
+    filters point by point in Python, so a filtered search scans the whole
+    collection however selective the filter is.
+    """
+    options = client.init_options
+    return options.get("location") == ":memory:" or bool(options.get("path"))
+
+
+def close_qdrant_clients():
+    """Close every shared client (releases the lock on embedded storage)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,47 @@
+"""
+Deterministic offline stand-in for OpenAIEmbeddings.
+(The chat side uses backend.llm.FakeLLMBackend.)
+
+FakeEmbeddings uses the hashing trick over word tokens, so texts that share
+words get similar vectors and retrieval results stay meaningful without
+any network access.
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+class FakeEmbeddings(Embeddings):
+    """Bag-of-words hashing embeddings with a fixed dimensionality"""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.size
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.texts_embedded += 1
+        return self._embed(text)
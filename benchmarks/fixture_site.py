@@ -0,0 +1,127 @@
+"""
+Generated documentation site served from a local HTTP server.
+
+The site has a robots.txt, a sitemap, a tree of linked pages with prose
+and code blocks, and a handful of topics so questions can be matched to
+the page that answers them.
+"""
+import os
+import random
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+TOPICS = [
+    "installation", "configuration", "authentication", "routing", "database",
+    "caching", "logging", "testing", "deployment", "middleware", "templates",
+    "serialization", "pagination", "websockets", "scheduling", "migrations"
+]
+
+WORDS = (
+    "the request handler returns a response object with headers status and body "
+    "use the client to connect configure settings before starting the server "
+    "each module exposes functions classes and helpers for common tasks "
+    "errors are raised when values are invalid or missing from the payload"
+).split()
+
+
+def page_topic(index: int) -> str:
+    return TOPICS[index % len(TOPICS)]
+
+
+def _page_html(index: int, num_pages: int, rng: random.Random) -> str:
+    topic = page_topic(index)
+    paragraphs = []
+    for _ in range(6):
+        words = [rng.choice(WORDS) for _ in range(80)]
+        # Sprinkle the topic so questions about it retrieve this page
+        for position in range(0, len(words), 15):
+            words[position] = topic
+        paragraphs.append(f"<p>{' '.join(words)}.</p>")
+
+    children = [i for i in (2 * index + 1, 2 * index + 2) if i < num_pages]
+    links = "".join(f'<li><a href="/docs/page{i}.html">{page_topic(i)} {i}</a></li>' for i in children)
+
+    code = (
+        f"<pre><code class=\"language-python\">import framework\n\n"
+        f"def setup_{topic}_{index}(app):\n"
+        f"    app.enable('{topic}', level={index})\n"
+        f"    return app</code></pre>"
+    )
+
+    return (
+        f"<html><head><title>{topic.title()} guide {index} | Fixture Docs</title></head>"
+        f"<body><nav><a href=\"/docs/page0.html\">Home</a></nav>"
+        f"<main><h1>{topic.title()} guide {index}</h1>{''.join(paragraphs)}{code}"
+        f"<ul>{links}</ul></main><footer>Fixture footer</footer></body></html>"
+    )
+
+
+def generate_site(root: str, num_pages: int, seed: int = 7, with_sitemap: bool = True) -> Dict[str, str]:
+    """Write the fixture site under root; returns {path: topic}"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "docs"), exist_ok=True)
+
+    pages = {}
+    for index in range(num_pages):
+        path = f"/docs/page{index}.html"
+        with open(os.path.join(root, path.lstrip("/")), "w", encoding="utf-8") as f:
+            f.write(_page_html(index, num_pages, rng))
+        pages[path] = page_topic(index)
+
+    # No Sitemap: line; the scraper falls back to /sitemap.xml
+    with open(os.path.join(root, "robots.txt"), "w") as f:
+        f.write("User-agent: *\nDisallow: /private/\n")
+
+    if with_sitemap:
+        entries = "".join(
+            f"<url><loc>{path}</loc><lastmod>2024-01-{1 + i % 28:02d}</lastmod></url>"
+            for i, path in enumerate(pages)
+        )
+        with open(os.path.join(root, "sitemap.xml"), "w") as f:
+            f.write(f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>')
+
+    return pages
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureSite:
+    """Context manager that generates and serves a fixture site on localhost"""
+
+    def __init__(self, num_pages: int = 100, with_sitemap: bool = True):
+        self.num_pages = num_pages
+        self.with_sitemap = with_sitemap
+        self.pages: Dict[str, str] = {}
+        self._tmpdir = None
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/docs/page0.html"
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def urls_for_topic(self, topic: str) -> List[str]:
+        return [self.url(path) for path, page_topic in self.pages.items() if page_topic == topic]
+
+    def __enter__(self):
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="docchat-site-")
+        self.pages = generate_site(self._tmpdir.name, self.num_pages, with_sitemap=self.with_sitemap)
+        handler = partial(_QuietHandler, directory=self._tmpdir.name)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+        self._tmpdir.cleanup()
@@ -0,0 +1,193 @@
+"""
+Page-then-chunk vs. flat retrieval as the collection grows.
+
+Usage:
+    python benchmarks/hierarchical_retrieval.py
+    python benchmarks/hierarchical_retrieval.py --sizes 1000,10000,100000,1000000 --candidates 5,10,20
+    python benchmarks/hierarchical_retrieval.py --url http://localhost:6333 --output hierarchical.json
+
+Synthetic chunk vectors are grouped into pages (each page's chunks
+scatter around a shared topic vector) and written in DocumentationRAG's
+layout: chunk points, plus one mean vector per page in the page
+collection. For every size the same queries go through
+DocumentationRAG's flat search and its two-stage search (page_candidates
+pages, then chunks within them). The report shows p50/p95 latency and
+recall@k against exact brute-force top-k.
+
+Without --url the in-memory Qdrant is used. It searches by brute force,
+so the flat side is exact there; a Qdrant server uses HNSW for both.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from langchain.docstore.document import Document
+
+from benchmarks.fakes import FakeEmbeddings
+from backend.catalog import CollectionCatalog
+from backend.llm import FakeLLMBackend
+from backend.rag import DocumentationRAG
+
+COLLECTION = "bench_hierarchical"
+
+
+def make_vectors(num_chunks: int, chunks_per_page: int, dim: int, spread: float, rng) -> np.ndarray:
+    """Unit chunk vectors, chunks_per_page consecutive ones per page topic"""
+    num_pages = num_chunks // chunks_per_page
+    topics = rng.standard_normal((num_pages, dim), dtype=np.float32)
+    vectors = np.repeat(topics, chunks_per_page, axis=0)
+    vectors += spread * rng.standard_normal(vectors.shape, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_collection(rag: DocumentationRAG, vectors: np.ndarray, chunks_per_page: int, batch_size: int = 4096):
+    """Write chunk and page points the way DocumentationRAG._store_chunks does"""
+    from qdrant_client import models
+
+    for collection in (rag.collection_name, rag.page_collection):
+        if rag.qdrant.collection_exists(collection):
+            rag.qdrant.delete_collection(collection)
+        rag.qdrant.create_collection(
+            collection, vectors_config=models.VectorParams(size=vectors.shape[1], distance=models.Distance.COSINE)
+        )
+        rag._create_payload_indexes(collection)
+
+    for start in range(0, len(vectors), batch_size):
+        stop = min(start + batch_size, len(vectors))
+        chunks = []
+        for index in range(start, stop):
+            page, position = divmod(index, chunks_per_page)
+            chunks.append(Document(page_content=f"chunk {position} of page {page}",
+                                   metadata={'source': f"https://docs.example.com/page{page}",
+                                             'title': f"Page {page}", 'has_code': page % 3 == 0}))
+        rag.qdrant.upload_collection(
+            rag.collection_name,
+            vectors=vectors[start:stop],
+            payload=[rag._payload(chunk) for chunk in chunks],
+            ids=[rag._point_id(chunk.metadata['source'], index % chunks_per_page)
+                 for index, chunk in enumerate(chunks, start)],
+            batch_size=1024,
+        )
+        rag._store_page_vectors(chunks, vectors[start:stop])
+
+
+def time_search(rag: DocumentationRAG, queries: np.ndarray, k: int):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        docs = rag._search(query.tolist(), k, None)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({doc.metadata['_id'] for doc in docs})
+    return latencies, results
+
+
+def recall(results, truth) -> float:
+    return statistics.mean(len(found & expected) / len(expected) for found, expected in zip(results, truth))
+
+
+def run_size(rag: DocumentationRAG, size: int, args, rng) -> dict:
+    vectors = make_vectors(size, args.chunks_per_page, args.dim, args.spread, rng)
+    started = time.perf_counter()
+    build_collection(rag, vectors, args.chunks_per_page)
+    build_seconds = time.perf_counter() - started
+
+    # Queries near random chunks; exact top-k by brute force
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = vectors[picks] + args.query_noise * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = []
+    for query in queries:
+        top = np.argpartition(-(vectors @ query), args.k)[:args.k]
+        truth.append({rag._point_id(f"https://docs.example.com/page{i // args.chunks_per_page}",
+                                    i % args.chunks_per_page) for i in top})
+
+    rag.hierarchical = False
+    time_search(rag, queries[:3], args.k)  # warm-up
+    flat_latencies, flat_results = time_search(rag, queries, args.k)
+    result = {
+        "chunks": size,
+        "pages": size // args.chunks_per_page,
+        "build_seconds": round(build_seconds, 2),
+        "flat": {
+            "p50_ms": round(statistics.median(flat_latencies), 3),
+            "p95_ms": round(np.percentile(flat_latencies, 95), 3),
+            "recall": round(recall(flat_results, truth), 4),
+        },
+        "hierarchical": {},
+    }
+
+    rag.hierarchical = True
+    for candidates in args.candidates:
+        rag.page_candidates = candidates
+        time_search(rag, queries[:3], args.k)
+        latencies, results = time_search(rag, queries, args.k)
+        result["hierarchical"][candidates] = {
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(np.percentile(latencies, 95), 3),
+            "recall": round(recall(results, truth), 4),
+            "speedup_p50": round(statistics.median(flat_latencies) / statistics.median(latencies), 2),
+        }
+
+    for collection in (rag.collection_name, rag.page_collection):
+        rag.qdrant.delete_collection(collection)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma-separated numbers of chunk vectors")
+    parser.add_argument("--candidates", default="5,10,20", help="comma-separated page_candidates (M) values")
+    parser.add_argument("--chunks-per-page", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--spread", type=float, default=1.0, help="chunk noise around the page topic")
+    parser.add_argument("--query-noise", type=float, default=0.05)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--url", help="Qdrant server URL (default: in-memory Qdrant)")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    args.candidates = [int(value) for value in args.candidates.split(",")]
+
+    if args.url:
+        os.environ["VECTOR_STORE_BACKEND"] = "server"
+        os.environ["QDRANT_URL"] = args.url
+    else:
+        os.environ["VECTOR_STORE_BACKEND"] = "memory"
+
+    catalog = CollectionCatalog(os.path.join(tempfile.mkdtemp(prefix="docchat-bench-"), "catalog.db"))
+    rag = DocumentationRAG(COLLECTION, catalog=catalog, embedding_model=FakeEmbeddings(args.dim),
+                           llm=FakeLLMBackend())
+    rag.vector_store = rag._make_vector_store()
+
+    rng = np.random.default_rng(0)
+    results = []
+    print(f"{'chunks':>9}  {'search':<14} {'p50 ms':>9} {'p95 ms':>9} {'recall@' + str(args.k):>9} {'speed-up':>9}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        result = run_size(rag, size, args, rng)
+        results.append(result)
+        flat = result["flat"]
+        print(f"{size:>9,}  {'flat':<14} {flat['p50_ms']:>9.2f} {flat['p95_ms']:>9.2f} {flat['recall']:>9.3f}")
+        for candidates, stats in result["hierarchical"].items():
+            print(f"{'':>9}  {f'pages M={candidates}':<14} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                  f"{stats['recall']:>9.3f} {stats['speedup_p50']:>8.1f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": {key: value for key, value in vars(args).items() if key != "output"},
+                       "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cold-start import profile for the app and backend entry points.
+
+Usage:
+    python benchmarks/import_time.py                  # default entry points
+    python benchmarks/import_time.py --top 25 --repeat 5
+    python benchmarks/import_time.py --target "import backend.rag" --output imports.json
+
+Each target is imported in a fresh interpreter under `python -X importtime`.
+The report shows wall-clock import time per target (best of --repeat runs,
+so disk-cache effects are excluded) and the heaviest top-level imports it
+pulls in, by cumulative time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the Streamlit app imports before its first render, and the
+# modules loaded later on first use or by the background pre-warm
+DEFAULT_TARGETS = {
+    "app startup": "import streamlit, backend.catalog, backend.startup, backend.formatting",
+    "backend": "import backend",
+    "backend.rag": "import backend.rag",
+    "backend.scraper": "import backend.scraper",
+    "backend pre-warm": "import backend.startup as s; [__import__(m) for m in s.HEAVY_MODULES]",
+}
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_ms, cumulative_ms, depth)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return modules
+
+
+def profile(statement: str) -> dict:
+    """Run statement in a fresh interpreter; return wall time and module timings"""
+    code = f"import time\n_start = time.perf_counter()\n{statement}\nprint(time.perf_counter() - _start)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return {
+        "wall_ms": float(result.stdout.strip().splitlines()[-1]) * 1000,
+        "modules": parse_importtime(result.stderr),
+    }
+
+
+def run(targets: dict, repeat: int, top: int) -> dict:
+    # Modules every interpreter loads at startup (site, encodings, ...)
+    interpreter = {m[0] for m in profile("pass")["modules"]}
+
+    results = {}
+    for label, statement in targets.items():
+        best = min((profile(statement) for _ in range(repeat)), key=lambda run: run["wall_ms"])
+        best["modules"] = [m for m in best["modules"] if m[0] not in interpreter]
+        # Depth 0 is imported by the statement itself, depth 1 by those modules
+        heaviest = sorted(
+            (m for m in best["modules"] if m[3] <= 1),
+            key=lambda m: m[2], reverse=True
+        )[:top]
+        results[label] = {
+            "statement": statement,
+            "wall_ms": round(best["wall_ms"], 1),
+            "modules_imported": len(best["modules"]),
+            "heaviest": [{"module": name, "cumulative_ms": round(cumulative, 1)}
+                         for name, _, cumulative, _ in heaviest],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append",
+                        help="Import statement to profile (repeatable; default: the app entry points)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    targets = {statement: statement for statement in args.target} if args.target else DEFAULT_TARGETS
+    results = run(targets, args.repeat, args.top)
+
+    for label, result in results.items():
+        print(f"\n{label}: {result['wall_ms']:.1f} ms, {result['modules_imported']} modules")
+        for entry in result["heaviest"]:
+            print(f"    {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Qdrant server transport: bulk-upload throughput and per-search overhead,
+REST vs. gRPC.
+
+Usage:
+    docker-compose up -d qdrant
+    python benchmarks/qdrant_transport.py
+    python benchmarks/qdrant_transport.py --points 50000 --batch-sizes 64,256,1024 --parallel 1,2,4
+
+Upload: synthetic points in DocumentationRAG's payload layout (compressed
+text plus the indexed metadata) are written with upload_points for every
+transport x batch size x parallelism, and with the one-upsert-per-64-points
+loop ingestion used before, as the baseline. Search: k=4 queries against a
+small collection, so the time is dominated by per-request overhead rather
+than the search itself; in-memory Qdrant is included for reference.
+The server rows are skipped if QDRANT_URL (or --url) is not reachable.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import models
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.payload import encode_text
+from backend.vectorstore import _create_client
+
+COLLECTION = "bench_transport"
+TEXT = ("Configure the connection pool before the first request. " * 30)[:1500]
+
+
+def make_points(count: int, dims: int, rng) -> list:
+    vectors = rng.standard_normal((count, dims), dtype=np.float32)
+    text = encode_text(TEXT)
+    return [
+        models.PointStruct(
+            id=i,
+            vector=vector.tolist(),
+            payload={'metadata': {'source': f"https://docs.example.com/page{i // 4}",
+                                  'title': f"Page {i // 4}", 'has_code': i % 3 == 0}, **text}
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def reset(client, dims: int):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=dims, distance=models.Distance.COSINE))
+
+
+def time_upload(client, points: list, dims: int, batch_size: int, parallel: int) -> float:
+    reset(client, dims)
+    started = time.perf_counter()
+    if parallel == 0:
+        # Baseline: sequential upsert calls of batch_size points
+        for start in range(0, len(points), batch_size):
+            client.upsert(COLLECTION, points=points[start:start + batch_size])
+    else:
+        client.upload_points(COLLECTION, points=points, batch_size=batch_size, parallel=parallel, wait=True)
+    elapsed = time.perf_counter() - started
+    if client.count(COLLECTION).count != len(points):
+        raise SystemExit("Not every point was stored")
+    return len(points) / elapsed
+
+
+def time_search(client, dims: int, queries: np.ndarray) -> list:
+    reset(client, dims)
+    client.upload_points(COLLECTION, points=make_points(1000, dims, np.random.default_rng(1)), wait=True)
+    client.query_points(COLLECTION, query=queries[0].tolist(), limit=4)  # connection setup
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        client.query_points(COLLECTION, query=query.tolist(), limit=4, with_payload=['metadata'])
+        latencies.append((time.perf_counter() - started) * 1000)
+    client.delete_collection(COLLECTION)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--batch-sizes", default="64,256,1024")
+    parser.add_argument("--parallel", default="1,2,4")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--url", help="Qdrant server URL (default: QDRANT_URL or http://localhost:6333)")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    if args.url:
+        os.environ["QDRANT_URL"] = args.url
+
+    rng = np.random.default_rng(42)
+    queries = rng.standard_normal((args.queries, args.dims), dtype=np.float32)
+    results = {"points": args.points, "dims": args.dims, "upload": [], "search": []}
+
+    clients = {"memory": _create_client("memory")}
+    for transport, prefer_grpc in (("rest", False), ("grpc", True)):
+        client = _create_client("server", prefer_grpc=prefer_grpc)
+        try:
+            client.get_collections()
+        except Exception as e:
+            print(f"{transport}: server not reachable, skipped ({e.__class__.__name__})")
+            continue
+        clients[transport] = client
+
+    print(f"\nSearch overhead, k=4 on 1,000 points x {args.dims} dims, {args.queries} queries")
+    print(f"{'transport':<10}{'p50 ms':>10}{'p95 ms':>10}")
+    for transport, client in clients.items():
+        latencies = time_search(client, args.dims, queries)
+        p50, p95 = statistics.median(latencies), float(np.percentile(latencies, 95))
+        results["search"].append({"transport": transport, "p50_ms": round(p50, 3), "p95_ms": round(p95, 3)})
+        print(f"{transport:<10}{p50:>10.3f}{p95:>10.3f}")
+
+    server_transports = [transport for transport in clients if transport != "memory"]
+    if server_transports:
+        points = make_points(args.points, args.dims, rng)
+        print(f"\nUpload, {args.points:,} points x {args.dims} dims")
+        print(f"{'transport':<10}{'method':<26}{'points/s':>12}")
+        for transport in server_transports:
+            runs = [("upsert loop, 64/request", 64, 0)] + [
+                (f"upload_points {batch}x{parallel}", batch, parallel)
+                for batch in (int(value) for value in args.batch_sizes.split(","))
+                for parallel in (int(value) for value in args.parallel.split(","))
+            ]
+            for label, batch_size, parallel in runs:
+                rate = time_upload(clients[transport], points, args.dims, batch_size, parallel)
+                results["upload"].append({"transport": transport, "batch_size": batch_size,
+                                          "parallel": parallel, "points_per_sec": round(rate, 1)})
+                print(f"{transport:<10}{label:<26}{rate:>12,.0f}")
+            clients[transport].delete_collection(COLLECTION)
+
+    for client in clients.values():
+        client.close()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
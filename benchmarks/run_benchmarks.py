@@ -0,0 +1,193 @@
+"""
+End-to-end offline benchmark: crawl, ingestion and query latency.
+
+Usage:
+    python benchmarks/run_benchmarks.py                     # run and compare to baseline
+    python benchmarks/run_benchmarks.py --update-baseline   # store results as the new baseline
+    python benchmarks/run_benchmarks.py --pages 200 --queries 100 --output results.json
+
+Everything runs locally: a generated documentation site on 127.0.0.1,
+deterministic fake embeddings/chat, and in-memory Qdrant. Exits with
+status 1 if any metric regresses by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["VECTOR_STORE_BACKEND"] = "memory"
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.fixture_site import TOPICS, FixtureSite
+from backend.catalog import CollectionCatalog
+from backend.llm import FakeLLMBackend
+from backend.rag import DocumentationRAG
+from backend.scraper import DocumentationScraper
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# metric -> True if higher is better
+METRICS = {
+    "scrape.pages_per_sec": True,
+    "ingest.chunks_per_sec": True,
+    "ingest.peak_rss_mb": False,
+    "query.p50_ms": False,
+    "query.p95_ms": False,
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return usage / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """Swallow the scraper/RAG progress prints unless --verbose"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def run(args) -> dict:
+    results = {}
+    catalog = CollectionCatalog(os.path.join(tempfile.mkdtemp(prefix="docchat-bench-"), "catalog.db"))
+
+    with FixtureSite(num_pages=args.pages) as site:
+        # Crawl
+        scraper = DocumentationScraper(site.base_url, max_pages=args.pages,
+                                       max_workers=args.workers, request_delay=0)
+        with quiet(not args.verbose):
+            start = time.perf_counter()
+            documents = scraper.scrape_documentation()
+            elapsed = time.perf_counter() - start
+        results["scrape"] = {
+            "pages": len(documents),
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(len(documents) / elapsed, 2),
+        }
+
+        # Ingestion (the chunk/embed/store half of create_vector_store)
+        rag = DocumentationRAG("bench_docs", catalog=catalog,
+                               embedding_model=FakeEmbeddings(), llm=FakeLLMBackend())
+        with quiet(not args.verbose):
+            start = time.perf_counter()
+            rag.index_documents(documents, site.base_url)
+            elapsed = time.perf_counter() - start
+        chunks = rag.doc_metadata["chunk_count"]
+        points, _ = rag.qdrant.scroll(rag.collection_name, limit=chunks, with_payload=True)
+        results["ingest"] = {
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(chunks / elapsed, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "payload_bytes_per_point": round(statistics.mean(len(json.dumps(point.payload)) for point in points)),
+        }
+
+        # Query (retrieval + prompt assembly + fake generation + post-processing)
+        questions = [f"How do I configure {TOPICS[i % len(TOPICS)]}?" for i in range(args.queries)]
+        latencies = []
+        with quiet(not args.verbose):
+            for question in questions:
+                start = time.perf_counter()
+                rag.query(question)
+                latencies.append((time.perf_counter() - start) * 1000)
+        results["query"] = {
+            "count": len(latencies),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "mean_ms": round(statistics.mean(latencies), 3),
+        }
+
+    results["environment"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pages": args.pages,
+        "queries": args.queries,
+        "workers": args.workers,
+    }
+    return results
+
+
+def lookup(results: dict, metric: str):
+    section, key = metric.split(".")
+    return results.get(section, {}).get(key)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print a comparison table and return the list of regressed metrics"""
+    regressions = []
+    print(f"\n{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for metric, higher_is_better in METRICS.items():
+        old, new = lookup(baseline, metric), lookup(results, metric)
+        if old is None or new is None or old == 0:
+            continue
+        change = (new - old) / old
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        flag = "  ✗" if regressed else ""
+        print(f"{metric:<24}{old:>12}{new:>12}{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(metric)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative regression before failing (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Link-filter microbenchmark: the compiled URLScope vs. the per-call
+substring loop it replaced.
+
+Usage:
+    python benchmarks/url_scope.py
+    python benchmarks/url_scope.py --links 500000 --repeat 5 --output url_scope.json
+
+A fixture of links like those found on a link-dense documentation site
+(same-host pages, other hosts, downloads, login/blog pages, anchors) is
+filtered by each matcher. Both must accept the same links; the report
+shows ns per link (best of --repeat runs) and the speed-up.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.urlscope import URLScope
+
+BASE_URL = "https://docs.example.com/3/"
+
+SECTIONS = ["library", "reference", "tutorial", "howto", "c-api", "whatsnew", "faq"]
+EXCLUDED = ["/search", "/login", "/download", "/blog", "/community", "/privacy", "/legal"]
+EXTENSIONS = [".html", ".html", ".html", "", "/", ".pdf", ".zip"]
+HOSTS = ["docs.example.com"] * 8 + ["example.com", "github.com", "pypi.org"]
+
+
+def legacy_is_documentation_url(url: str, base_url: str) -> bool:
+    """The filter as it was: fragment loop plus urlparse of both URLs on every call"""
+    parsed = urlparse(url)
+    exclude_patterns = [
+        '/search', '/login', '/register', '/download', '/community',
+        '/news', '/events', '/jobs', '/blog', '/forum', '/support',
+        '.pdf', '.zip', '.tar.gz', '.exe', '.dmg',
+        'javascript:', 'mailto:', '#',
+        '/privacy', '/terms', '/cookies', '/legal'
+    ]
+    url_lower = url.lower()
+    for pattern in exclude_patterns:
+        if pattern in url_lower:
+            return False
+    base_domain = urlparse(base_url).netloc
+    return parsed.netloc == base_domain
+
+
+def make_links(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    links = []
+    for _ in range(count):
+        host = rng.choice(HOSTS)
+        if rng.random() < 0.1:
+            path = rng.choice(EXCLUDED) + f"/item{rng.randrange(1000)}"
+        else:
+            section = rng.choice(SECTIONS)
+            path = f"/3/{section}/{'module' if rng.random() < 0.7 else 'Topic'}{rng.randrange(5000)}"
+            path += rng.choice(EXTENSIONS)
+        links.append(f"https://{host}{path}")
+    return links
+
+
+def best_time(matcher, links: list, repeat: int):
+    best, accepted = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        accepted = [link for link in links if matcher(link)]
+        best = min(best, time.perf_counter() - start)
+    return best, accepted
+
+
+def run(num_links: int, repeat: int) -> dict:
+    links = make_links(num_links)
+    scope = URLScope(BASE_URL)
+    scoped = URLScope(BASE_URL, path_prefixes=["/3/library/"], exclude=["*/Topic*"])
+
+    legacy_seconds, legacy_accepted = best_time(lambda url: legacy_is_documentation_url(url, BASE_URL), links, repeat)
+    scope_seconds, scope_accepted = best_time(scope.matches, links, repeat)
+    scoped_seconds, scoped_accepted = best_time(scoped.matches, links, repeat)
+    if legacy_accepted != scope_accepted:
+        raise SystemExit("URLScope and the legacy filter disagree on the fixture")
+
+    per_link = lambda seconds: round(seconds / num_links * 1e9, 1)
+    return {
+        "links": num_links,
+        "accepted": len(scope_accepted),
+        "accepted_with_prefix_and_globs": len(scoped_accepted),
+        "legacy_ns_per_link": per_link(legacy_seconds),
+        "scope_ns_per_link": per_link(scope_seconds),
+        "scope_with_prefix_and_globs_ns_per_link": per_link(scoped_seconds),
+        "speedup": round(legacy_seconds / scope_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = run(args.links, args.repeat)
+    print(f"{results['links']:,} links, {results['accepted']:,} in scope")
+    print(f"  legacy filter:                {results['legacy_ns_per_link']:>8.1f} ns/link")
+    print(f"  URLScope:                     {results['scope_ns_per_link']:>8.1f} ns/link "
+          f"({results['speedup']}x)")
+    print(f"  URLScope + prefix and globs:  {results['scope_with_prefix_and_globs_ns_per_link']:>8.1f} ns/link "
+          f"({results['accepted_with_prefix_and_globs']:,} in scope)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
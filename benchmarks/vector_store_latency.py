@@ -0,0 +1,93 @@
+"""
+Search latency: embedded (local) Qdrant vs. the networked Qdrant server.
+
+Usage:
+    docker-compose up -d qdrant      # optional, for the server numbers
+    python benchmarks/vector_store_latency.py --points 5000 --queries 200
+
+Random unit vectors are used so the benchmark needs no OpenAI access.
+The server backend is skipped if QDRANT_URL is not reachable.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from qdrant_client import models
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.vectorstore import close_qdrant_clients, get_qdrant_client
+
+COLLECTION = "bench_latency"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(backend: str, vectors: np.ndarray, queries: np.ndarray, k: int):
+    client = get_qdrant_client(backend)
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        COLLECTION,
+        vectors_config=models.VectorParams(size=vectors.shape[1], distance=models.Distance.COSINE)
+    )
+    client.upload_points(
+        COLLECTION,
+        points=[
+            models.PointStruct(id=i, vector=vector.tolist(), payload={"source": f"page-{i % 100}"})
+            for i, vector in enumerate(vectors)
+        ],
+        batch_size=256
+    )
+
+    # Warm-up so connection setup is not counted
+    client.query_points(COLLECTION, query=queries[0].tolist(), limit=k)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.query_points(COLLECTION, query=query.tolist(), limit=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    client.delete_collection(COLLECTION)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dims", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.points, args.dims)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, args.dims)).astype(np.float32)
+
+    os.environ.setdefault("QDRANT_PATH", tempfile.mkdtemp(prefix="docchat-bench-"))
+
+    print(f"{args.points} points x {args.dims} dims, {args.queries} queries, k={args.k}\n")
+    print(f"{'backend':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for backend in ("local", "server"):
+        try:
+            latencies = run(backend, vectors, queries, args.k)
+        except Exception as e:
+            print(f"{backend:<10}skipped ({e.__class__.__name__}: {e})")
+            continue
+        print(f"{backend:<10}{percentile(latencies, 50):>10.3f}"
+              f"{percentile(latencies, 95):>10.3f}{statistics.mean(latencies):>10.3f}")
+
+    close_qdrant_clients()
+
+
+if __name__ == "__main__":
+    main()